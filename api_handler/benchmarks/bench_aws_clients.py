@@ -0,0 +1,30 @@
+"""
+Cost of building a DynamoDB table resource per request against the shared one of free_market_fandango_api.aws.
+
+    python benchmarks/bench_aws_clients.py
+
+No request is sent, building a resource opens no connection.
+"""
+import os
+
+import boto3
+
+from common import per_call, report
+
+from free_market_fandango_api.aws import get_dynamodb_table
+
+
+def new_table():
+    return boto3.resource("dynamodb").Table(os.environ["DYNAMODB_TABLE_ARN"])
+
+
+def main():
+    get_dynamodb_table()
+
+    print("Table resource per request:")
+    report("boto3.resource(...).Table(...)", per_call(new_table, 20), "request")
+    report("aws.get_dynamodb_table()", per_call(get_dynamodb_table, 100_000), "request")
+
+
+if __name__ == "__main__":
+    main()
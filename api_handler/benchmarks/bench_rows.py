@@ -0,0 +1,63 @@
+"""
+Per-row cost of building list results from DynamoDB items as validated models, as the crud modules used to, and as
+the slotted rows of free_market_fandango_api.rows.
+
+    python benchmarks/bench_rows.py [items]
+"""
+import datetime
+import sys
+
+from common import balance_items, per_call, price_change_items, purchase_items, report
+
+from free_market_fandango_api.rows import MarketBalanceRow, PriceChangeRow, PurchaseRow
+from free_market_fandango_api.schemas import MarketBalance, PriceChange, PurchaseOut
+from free_market_fandango_api.utils import explode_key
+
+
+def purchase_model(item):
+    _, card_number, timestamp = explode_key(item["SK"])
+
+    return PurchaseOut(
+        price=item["Price"],
+        stock_code=item["StockCode"],
+        card_number=card_number,
+        previous_balance=item["PreviousBalance"],
+        timestamp=datetime.datetime.fromisoformat(timestamp),
+    )
+
+
+def price_change_model(item):
+    _, stock_code, timestamp = explode_key(item["SK"])
+
+    return PriceChange(
+        stock_code=stock_code,
+        previous_price=item["PreviousPrice"],
+        reason=item["Reason"],
+        timestamp=datetime.datetime.fromisoformat(timestamp),
+    )
+
+
+def balance_model(item):
+    return MarketBalance(card_number=explode_key(item["SK"])[1], balance=item["Balance"])
+
+
+def main(count: int):
+    cases = [
+        ("purchase", purchase_items(count), purchase_model, PurchaseRow.from_item),
+        ("price change", price_change_items(count), price_change_model, PriceChangeRow.from_item),
+        ("balance", balance_items(count), balance_model, MarketBalanceRow.from_item),
+    ]
+
+    print(f"Building {count} results:")
+
+    for label, items, model, row in cases:
+        report(f"{label}, model", per_call(lambda: [model(item) for item in items], 3) / count, "row")
+        report(f"{label}, row", per_call(lambda: [row(item) for item in items], 3) / count, "row")
+
+    model, row = purchase_model(cases[0][1][0]), PurchaseRow.from_item(cases[0][1][0])
+    print(f"Size of a purchase: row {sys.getsizeof(row)} bytes, model and __dict__ "
+          f"{sys.getsizeof(model) + sys.getsizeof(model.__dict__)} bytes")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
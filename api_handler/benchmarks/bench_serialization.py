@@ -0,0 +1,45 @@
+"""
+Per-row cost of serializing a list response of PurchaseOut models the ways FastAPI and responses.page_response do.
+
+    python benchmarks/bench_serialization.py [rows]
+"""
+import asyncio
+import sys
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from common import per_call, purchase_items, report
+
+from free_market_fandango_api.responses import page_response
+from free_market_fandango_api.rows import PurchaseRow
+from free_market_fandango_api.schemas import PurchaseOut
+
+
+def main(count: int):
+    models = [PurchaseOut.model_validate(PurchaseRow.from_item(item)) for item in purchase_items(count)]
+    field = create_model_field(name="Response_read_purchases", type_=list[PurchaseOut], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    # What a route without response_model does with the models it returns.
+    def encode():
+        return JSONResponse(loop.run_until_complete(serialize_response(response_content=models))).body
+
+    # What a route with response_model does: validate against the model, then dump to JSON.
+    def validate_and_dump():
+        return loop.run_until_complete(serialize_response(field=field, response_content=models, dump_json=True))
+
+    def single_pass():
+        return page_response(models, list[PurchaseOut], None).body
+
+    assert encode() == validate_and_dump() == single_pass()
+
+    print(f"Serializing {count} PurchaseOut rows:")
+    report("jsonable_encoder + json.dumps", per_call(encode, 3) / count, "row")
+    report("response_model validate + dump", per_call(validate_and_dump, 10) / count, "row")
+    report("page_response", per_call(single_pass, 10) / count, "row")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
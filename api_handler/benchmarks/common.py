@@ -0,0 +1,62 @@
+import datetime
+import decimal
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("DYNAMODB_TABLE_ARN", "free-market-fandango")
+os.environ.setdefault("SQS_QUEUE_URL", "free-market-fandango.fifo")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmark")
+
+_START = datetime.datetime(2026, 1, 1, 20)
+
+
+def purchase_items(count: int) -> list[dict]:
+    """Purchase items as DynamoDB returns them, numbers come back as Decimals."""
+    return [
+        {
+            "PK": "Market#00000000-0000-0000-0000-000000000000",
+            "SK": f"Purchase#{index % 50}#{(_START + datetime.timedelta(seconds=index)).isoformat()}",
+            "StockCode": f"STOCK{index % 8}",
+            "PreviousBalance": decimal.Decimal(100 + index % 17),
+            "Price": decimal.Decimal(index % 9 + 1),
+        }
+        for index in range(count)
+    ]
+
+
+def price_change_items(count: int) -> list[dict]:
+    return [
+        {
+            "PK": "Market#00000000-0000-0000-0000-000000000000",
+            "SK": f"Price#STOCK{index % 8}#{(_START + datetime.timedelta(seconds=index)).isoformat()}",
+            "PreviousPrice": decimal.Decimal(index % 9 + 1),
+            "Reason": "Purchase",
+        }
+        for index in range(count)
+    ]
+
+
+def balance_items(count: int) -> list[dict]:
+    return [
+        {
+            "PK": "Market#00000000-0000-0000-0000-000000000000",
+            "SK": f"Card#{index}",
+            "Balance": decimal.Decimal(100 + index % 17),
+        }
+        for index in range(count)
+    ]
+
+
+def per_call(func, number: int, repeat: int = 5) -> float:
+    """Best of `repeat` runs of `number` calls, in seconds per call."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def report(label: str, seconds: float, unit: str):
+    print(f"  {label:<36}{seconds * 1_000_000:8.2f} us/{unit}")
@@ -0,0 +1,47 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+_lock = threading.Lock()
+_table = None
+_sqs = None
+
+
+def _client_config() -> Config:
+    return Config(
+        max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "50")),
+        tcp_keepalive=os.environ.get("AWS_TCP_KEEPALIVE", "true").lower() == "true",
+        connect_timeout=float(os.environ.get("AWS_CONNECT_TIMEOUT", "2")),
+        read_timeout=float(os.environ.get("AWS_READ_TIMEOUT", "5")),
+        retries={
+            "mode": os.environ.get("AWS_RETRY_MODE", "standard"),
+            "max_attempts": int(os.environ.get("AWS_MAX_ATTEMPTS", "3")),
+        },
+    )
+
+
+def get_dynamodb_table():
+    # Built once per process and shared between threads, Table actions delegate to the underlying client which is
+    # thread-safe and keeps its HTTP connection pool alive across requests (and warm Lambda invocations).
+    global _table
+
+    if _table is None:
+        with _lock:
+            if _table is None:
+                dynamodb = boto3.resource("dynamodb", config=_client_config())
+                _table = dynamodb.Table(os.environ["DYNAMODB_TABLE_ARN"])
+
+    return _table
+
+
+def get_sqs_client():
+    global _sqs
+
+    if _sqs is None:
+        with _lock:
+            if _sqs is None:
+                _sqs = boto3.client("sqs", config=_client_config())
+
+    return _sqs
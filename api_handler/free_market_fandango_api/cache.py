@@ -0,0 +1,57 @@
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """A small thread-safe in-process cache whose entries expire `ttl` seconds after they were loaded."""
+
+    def __init__(self, ttl: float, max_size: int = 128):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+
+                return default
+
+            self.hits += 1
+
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self._max_size:
+                # Entries are kept in insertion order, drop the oldest one.
+                del self._entries[next(iter(self._entries))]
+
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+
+    def get_or_load(self, key, load):
+        value = self.get(key, _MISSING)
+
+        if value is _MISSING:
+            value = load()
+            self.set(key, value)
+
+        return value
+
+    def invalidate(self, key=_MISSING):
+        with self._lock:
+            if key is _MISSING:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -25,6 +25,10 @@ class KeyComponents(Enum):
     DETAILS = 'Details'
     PRICE = 'Price'
     EVENT = 'Event'
+    OUTBOX = 'Outbox'
+    OUTBOX_DEAD_LETTER = 'OutboxDeadLetter'
+    VERSION = 'Version'
+    AGGREGATE = 'Aggregate'
 
 
 setting_defaults = {
@@ -42,3 +46,21 @@ setting_defaults = {
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 360
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+# Keeps every action of a batch (market check, price checks, balance updates, purchase items, outbox messages and stock
+# and card aggregates) within the 100 item limit of a single DynamoDB transaction.
+MAX_BATCH_PURCHASES = 16
+
+MAX_BULK_IMPORT = 1000
+
+# API Gateway gives up on Lambda integrations after 29 seconds.
+MAX_CHANGES_WAIT_SECONDS = 25
+
+# Items are stamped with a time taken before they are written, reads resuming from a timestamp (changes cursors and
+# candles) go this far back to pick up the ones that became visible after the previous read.
+CHANGES_OVERLAP_SECONDS = 5
+
+MAX_SNAPSHOT_HISTORY = 100
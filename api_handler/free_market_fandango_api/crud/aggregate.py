@@ -0,0 +1,109 @@
+import operator
+
+from boto3.dynamodb.conditions import Key
+
+from ..constants import KeyComponents
+from ..schemas import CardAggregate, PurchaseOut, StockAggregate
+from ..utils import build_key, explode_key, iterate_query
+
+
+def _item_to_stock_aggregate(item):
+    *_, stock_code = explode_key(item["SK"])
+
+    return StockAggregate(stock_code=stock_code, count=item["Count"], revenue=item["Revenue"])
+
+
+def _item_to_card_aggregate(item):
+    *_, card_number = explode_key(item["SK"])
+
+    return CardAggregate(card_number=int(card_number), count=item["Count"], spend=item["Spend"])
+
+
+def aggregate_updates(table, market_uuid: str, purchases: list[PurchaseOut]):
+    """TransactWriteItems Updates that add a set of purchases to the per-stock and per-card counters of the market."""
+    market_key = build_key(KeyComponents.MARKET, market_uuid)
+
+    stocks = {}
+    cards = {}
+
+    for purchase in purchases:
+        count, revenue = stocks.get(purchase.stock_code, (0, 0))
+        stocks[purchase.stock_code] = (count + 1, revenue + purchase.price)
+
+        count, spend = cards.get(purchase.card_number, (0, 0))
+        cards[purchase.card_number] = (count + 1, spend + purchase.price)
+
+    def update(sort_key, amount_attribute, count, amount):
+        return {
+            "Update": {
+                "TableName": table.name,
+                "Key": {"PK": market_key, "SK": sort_key},
+                "UpdateExpression": "ADD #count :count, #amount :amount",
+                "ExpressionAttributeNames": {"#count": "Count", "#amount": amount_attribute},
+                "ExpressionAttributeValues": {":count": count, ":amount": amount},
+            }
+        }
+
+    return [
+        *(
+            update(build_key(KeyComponents.AGGREGATE, KeyComponents.STOCK, stock_code), "Revenue", count, revenue)
+            for stock_code, (count, revenue) in stocks.items()
+        ),
+        *(
+            update(build_key(KeyComponents.AGGREGATE, KeyComponents.CARD, card_number), "Spend", count, spend)
+            for card_number, (count, spend) in cards.items()
+        ),
+    ]
+
+
+def _read_aggregates(table, market_uuid: str, kind: KeyComponents, item_to_model):
+    items = iterate_query(
+        table,
+        KeyConditionExpression=(
+                Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
+                Key("SK").begins_with(build_key(KeyComponents.AGGREGATE, kind, ""))
+        ),
+    )
+
+    return [item_to_model(item) for item in items]
+
+
+def _read_aggregate(table, market_uuid: str, kind: KeyComponents, key, item_to_model):
+    response = table.get_item(
+        Key={
+            "PK": build_key(KeyComponents.MARKET, market_uuid),
+            "SK": build_key(KeyComponents.AGGREGATE, kind, key),
+        }
+    )
+
+    if "Item" not in response:
+        return None
+
+    return item_to_model(response["Item"])
+
+
+def _rank(aggregates, sort_by: str | None, top: int | None):
+    if sort_by is not None:
+        aggregates = sorted(aggregates, key=operator.attrgetter(sort_by), reverse=True)
+
+    return aggregates[:top] if top is not None else aggregates
+
+
+def read_stock_aggregates(table, market_uuid: str, sort_by: str | None = None, top: int | None = None):
+    return _rank(
+        _read_aggregates(table, market_uuid, KeyComponents.STOCK, _item_to_stock_aggregate), sort_by, top
+    )
+
+
+def read_stock_aggregate(table, market_uuid: str, stock_code: str):
+    return _read_aggregate(table, market_uuid, KeyComponents.STOCK, stock_code, _item_to_stock_aggregate)
+
+
+def read_card_aggregates(table, market_uuid: str, sort_by: str | None = None, top: int | None = None):
+    return _rank(
+        _read_aggregates(table, market_uuid, KeyComponents.CARD, _item_to_card_aggregate), sort_by, top
+    )
+
+
+def read_card_aggregate(table, market_uuid: str, card_number: int):
+    return _read_aggregate(table, market_uuid, KeyComponents.CARD, card_number, _item_to_card_aggregate)
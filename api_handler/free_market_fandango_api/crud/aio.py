@@ -0,0 +1,50 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from . import card, event, history, market, stock
+
+# boto3 calls block, they run on a pool of their own so a burst of fanned out reads cannot starve the threads Starlette
+# uses for sync routes. Its size also caps the DynamoDB requests in flight, keep it within AWS_MAX_POOL_CONNECTIONS.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CRUD_MAX_WORKERS", "16")),
+    thread_name_prefix="crud",
+)
+
+
+async def run(func, *args, **kwargs):
+    """Run a blocking crud function on the crud executor, keeping the caller's context variables."""
+    context = contextvars.copy_context()
+
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+def asyncify(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+
+    return wrapper
+
+
+read_active_market = asyncify(market.read_active_market)
+read_market = asyncify(market.read_market)
+read_market_prices = asyncify(market.read_market_prices)
+read_market_balances = asyncify(market.read_market_balances)
+read_market_balances_since = asyncify(market.read_market_balances_since)
+read_latest_price_changes = asyncify(history.read_latest_price_changes)
+read_price_candles = asyncify(history.read_price_candles)
+read_cards = asyncify(card.read_cards)
+read_stocks = asyncify(stock.read_stocks)
+read_events = asyncify(event.read_events)
+cards_exist = asyncify(card.cards_exist)
+stocks_exist = asyncify(stock.stocks_exist)
+events_exist = asyncify(event.events_exist)
+count_cards = asyncify(card.count_cards)
+count_stocks = asyncify(stock.count_stocks)
+count_events = asyncify(event.count_events)
+read_event = asyncify(event.read_event)
@@ -1,11 +1,12 @@
 import os
 from datetime import timedelta, datetime
-from jose import jwt
 
 from ..constants import ALGORITHM
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
+    from jose import jwt
+
     to_encode = data.copy()
     now = datetime.utcnow()
     expire = now + expires_delta if expires_delta else now + timedelta(minutes=15)
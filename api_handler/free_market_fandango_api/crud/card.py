@@ -1,5 +1,4 @@
-from boto3.dynamodb.conditions import Key
-
+from .catalog import CatalogCache
 from ..schemas import Card
 from ..constants import KeyComponents
 from ..utils import notify_cache_invalid_event
@@ -9,49 +8,52 @@ def _item_to_model(item):
     return Card(card_number=item["SK"], name=item["Name"], balance=item["Balance"])
 
 
+def _model_to_item(card: Card):
+    return {
+        "PK": KeyComponents.CARD.value,
+        "SK": str(card.card_number),
+        "Name": card.name,
+        "Balance": card.balance,
+    }
+
+
+_cards = CatalogCache(KeyComponents.CARD, _item_to_model)
+
+
 def read_card(table, card_number: int):
-    response = table.get_item(
-        Key={
-            "PK": KeyComponents.CARD.value,
-            "SK": str(card_number),
-        }
-    )
+    return _cards.read(table, str(card_number))
 
-    if "Item" not in response:
-        return None
 
-    return _item_to_model(response["Item"])
+def read_cards(table, limit: int | None = None, cursor: str | None = None):
+    return _cards.read_page(table, limit, cursor)
 
 
-def read_cards(table):
-    response = table.query(
-        KeyConditionExpression=Key("PK").eq(KeyComponents.CARD.value)
-    )
+def cards_exist(table) -> bool:
+    return _cards.exists(table)
 
-    return [_item_to_model(item) for item in response["Items"]]
 
+def count_cards(table) -> int:
+    return _cards.count(table)
 
-def update_card(table, card: Card):
-    table.put_item(
-        Item={
-            "PK": KeyComponents.CARD.value,
-            "SK": str(card.card_number),
-            "Name": card.name,
-            "Balance": card.balance,
-        }
-    )
 
+def update_card(table, card: Card):
+    _cards.put(table, _model_to_item(card))
     notify_cache_invalid_event(table)
 
     return card
 
 
-def delete_card(table, card_number: int):
-    table.delete_item(
-        Key={
-            "PK": KeyComponents.CARD.value,
-            "SK": str(card_number),
-        }
-    )
+def update_cards(table, cards: list[Card]):
+    with table.batch_writer() as batch:
+        for card in cards:
+            batch.put_item(Item=_model_to_item(card))
+
+    _cards.bump(table)
+    notify_cache_invalid_event(table)
 
+    return cards
+
+
+def delete_card(table, card_number: int):
+    _cards.delete(table, str(card_number))
     notify_cache_invalid_event(table)
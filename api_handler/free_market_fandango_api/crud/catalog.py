@@ -0,0 +1,153 @@
+import bisect
+import os
+import threading
+import time
+
+from boto3.dynamodb.conditions import Key
+
+from ..constants import KeyComponents
+from ..utils import decode_cursor, encode_cursor, iterate_query, query_count, query_exists
+
+_CACHE_SECONDS = float(os.environ.get("CATALOG_CACHE_SECONDS", "5"))
+
+
+class CatalogCache:
+    """
+    Read-through cache of one catalog partition (cards, stocks or events), indexed by sort key.
+
+    Every mutation bumps a version item for the partition, single items are written in the same transaction as the
+    bump. Within the TTL the cached index is trusted, afterwards the version item is read and the partition is only
+    queried again when the version has moved. The cached models are shared between callers and must not be modified.
+    """
+
+    def __init__(self, partition: KeyComponents, item_to_model):
+        self._partition = partition
+        self._item_to_model = item_to_model
+        self._lock = threading.Lock()
+        self._version = None
+        self._models = None
+        self._keys = None
+        self._checked_at = 0.0
+
+    def _version_key(self):
+        return {"PK": KeyComponents.VERSION.value, "SK": self._partition.value}
+
+    def _read_version(self, table) -> int:
+        response = table.get_item(Key=self._version_key(), ProjectionExpression="Version")
+
+        return int(response["Item"]["Version"]) if "Item" in response else 0
+
+    def _index(self, table):
+        with self._lock:
+            if self._models is not None and time.monotonic() < self._checked_at + _CACHE_SECONDS:
+                return self._models, self._keys
+
+        # The version is read before the partition, a mutation in between leaves a newer version behind and the next
+        # check rebuilds the index again.
+        version = self._read_version(table)
+
+        with self._lock:
+            if self._models is not None and version == self._version:
+                self._checked_at = time.monotonic()
+
+                return self._models, self._keys
+
+        models = {
+            item["SK"]: self._item_to_model(item)
+            for item in iterate_query(table, KeyConditionExpression=Key("PK").eq(self._partition.value))
+        }
+        keys = sorted(models)
+
+        with self._lock:
+            self._version, self._models, self._keys = version, models, keys
+            self._checked_at = time.monotonic()
+
+        return models, keys
+
+    def _cached_keys(self):
+        with self._lock:
+            if self._models is not None and time.monotonic() < self._checked_at + _CACHE_SECONDS:
+                return self._keys
+
+        return None
+
+    def exists(self, table) -> bool:
+        # Answered from the cache when it is fresh, otherwise without loading the partition.
+        keys = self._cached_keys()
+
+        if keys is not None:
+            return bool(keys)
+
+        return query_exists(table, KeyConditionExpression=Key("PK").eq(self._partition.value))
+
+    def count(self, table) -> int:
+        keys = self._cached_keys()
+
+        if keys is not None:
+            return len(keys)
+
+        return query_count(table, KeyConditionExpression=Key("PK").eq(self._partition.value))
+
+    def read(self, table, sort_key: str):
+        models, _ = self._index(table)
+
+        return models.get(sort_key)
+
+    def read_page(self, table, limit: int | None = None, cursor: str | None = None):
+        models, keys = self._index(table)
+
+        # Cursors match the LastEvaluatedKey format of a query on the partition, DynamoDB and Python order the string
+        # sort keys the same way.
+        start = bisect.bisect_right(keys, decode_cursor(cursor, self._partition.value)["SK"]) if cursor is not None else 0
+        end = len(keys) if limit is None else min(start + limit, len(keys))
+
+        next_cursor = (
+            encode_cursor({"PK": self._partition.value, "SK": keys[end - 1]})
+            if end < len(keys)
+            else None
+        )
+
+        return [models[key] for key in keys[start:end]], next_cursor
+
+    def _version_update(self, table):
+        return {
+            "Update": {
+                "TableName": table.name,
+                "Key": self._version_key(),
+                "UpdateExpression": "ADD Version :one",
+                "ExpressionAttributeValues": {":one": 1},
+            }
+        }
+
+    def _invalidate(self):
+        with self._lock:
+            self._models = None
+
+    def put(self, table, item):
+        """Write one item of the partition, bumping the version in the same transaction."""
+        table.meta.client.transact_write_items(
+            TransactItems=[{"Put": {"TableName": table.name, "Item": item}}, self._version_update(table)]
+        )
+
+        self._invalidate()
+
+    def delete(self, table, sort_key: str):
+        """Delete one item of the partition, bumping the version in the same transaction."""
+        table.meta.client.transact_write_items(
+            TransactItems=[
+                {"Delete": {"TableName": table.name, "Key": {"PK": self._partition.value, "SK": sort_key}}},
+                self._version_update(table),
+            ]
+        )
+
+        self._invalidate()
+
+    def bump(self, table):
+        # Batch writes cannot share a transaction with the version, it is bumped once they are all written.
+        table.update_item(
+            Key=self._version_key(),
+            UpdateExpression="ADD Version :one",
+            ExpressionAttributeValues={":one": 1},
+        )
+
+        self._invalidate()
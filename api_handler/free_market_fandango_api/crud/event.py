@@ -1,7 +1,6 @@
 from uuid import UUID
 
-from boto3.dynamodb.conditions import Key
-
+from .catalog import CatalogCache
 from ..schemas import EventIn, EventOut
 from ..constants import KeyComponents
 from ..utils import notify_cache_invalid_event
@@ -20,52 +19,60 @@ def _item_to_model(item):
     )
 
 
+_events = CatalogCache(KeyComponents.EVENT, _item_to_model)
+
+
+def _model_to_item(event: EventOut):
+    return {
+        "PK": KeyComponents.EVENT.value,
+        "SK": str(event.uuid),
+        "Title": event.title,
+        "Body": event.body,
+        "Breaking": event.breaking,
+        "VideoURL": event.video_url,
+        "ChangeMin": event.change_min,
+        "ChangeMax": event.change_max,
+        "Tags": event.tags,
+    }
+
+
 def read_event(table, event_uuid: UUID):
-    response = table.get_item(
-        Key={
-            "PK": KeyComponents.EVENT.value,
-            "SK": str(event_uuid),
-        }
-    )
+    return _events.read(table, str(event_uuid))
 
-    if "Item" not in response:
-        return None
 
-    return _item_to_model(response["Item"])
+def read_events(table, limit: int | None = None, cursor: str | None = None):
+    return _events.read_page(table, limit, cursor)
 
 
-def read_events(table):
-    response = table.query(KeyConditionExpression=Key("PK").eq(KeyComponents.EVENT.value))
+def events_exist(table) -> bool:
+    return _events.exists(table)
 
-    return [_item_to_model(item) for item in response["Items"]]
+
+def count_events(table) -> int:
+    return _events.count(table)
 
 
 def update_event(table, event_request: EventIn) -> EventOut:
     event = EventOut(**event_request.model_dump())
 
-    table.put_item(
-        Item={
-            "PK": KeyComponents.EVENT.value,
-            "SK": str(event.uuid),
-            "Title": event.title,
-            "Body": event.body,
-            "Breaking": event.breaking,
-            "VideoURL": event.video_url,
-            "ChangeMin": event.change_min,
-            "ChangeMax": event.change_max,
-            "Tags": event.tags,
-        }
-    )
+    _events.put(table, _model_to_item(event))
 
     return event
 
 
-def delete_event(table, event_uuid: str):
-    table.delete_item(
-        Key={
-            "PK": KeyComponents.EVENT.value,
-            "SK": event_uuid,
-        }
-    )
+def update_events(table, event_requests: list[EventIn]) -> list[EventOut]:
+    events = [EventOut(**event_request.model_dump()) for event_request in event_requests]
+
+    with table.batch_writer() as batch:
+        for event in events:
+            batch.put_item(Item=_model_to_item(event))
+
+    _events.bump(table)
+    notify_cache_invalid_event(table)
+
+    return events
 
+
+def delete_event(table, event_uuid: str):
+    _events.delete(table, event_uuid)
     notify_cache_invalid_event(table)
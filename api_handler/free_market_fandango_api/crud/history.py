@@ -1,40 +1,192 @@
 import datetime
+import decimal
+import os
+import threading
 
 from boto3.dynamodb.conditions import Key
 
-from ..utils import build_key, explode_key
-from ..constants import KeyComponents
-from ..schemas import PriceChange
+from ..cache import TTLCache
+from ..utils import build_key, explode_key, iterate_query, query_page, time_range_condition
+from ..constants import CHANGES_OVERLAP_SECONDS, KeyComponents
+from ..rows import PriceChangeRow
+from ..schemas import Candle
 
+_EPOCH = datetime.datetime(1970, 1, 1)
 
-def _item_to_model(item):
-    _, stock_code, timestamp = explode_key(item["SK"])
 
-    return PriceChange(
-        stock_code=stock_code,
-        previous_price=item["PreviousPrice"],
-        reason=item["Reason"],
-        timestamp=datetime.datetime.fromisoformat(timestamp),
-    )
-
-
-def read_price_history(table, market_uuid: str):
-    response = table.query(
+def read_price_history(table, market_uuid: str, limit: int | None = None, cursor: str | None = None):
+    items, next_cursor = query_page(
+        table,
+        limit,
+        cursor,
+        partition_key=build_key(KeyComponents.MARKET, market_uuid),
         KeyConditionExpression=(
                 Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
                 Key("SK").begins_with(KeyComponents.PRICE.value)
         )
     )
 
-    return [_item_to_model(item) for item in response["Items"]]
+    return [PriceChangeRow.from_item(item) for item in items], next_cursor
+
+
+def read_price_history_by_stock_code(
+        table,
+        market_uuid: str,
+        stock_code: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        newest_first: bool = False,
+):
+    items, next_cursor = query_page(
+        table,
+        limit,
+        cursor,
+        partition_key=build_key(KeyComponents.MARKET, market_uuid),
+        KeyConditionExpression=time_range_condition(
+            build_key(KeyComponents.MARKET, market_uuid), KeyComponents.PRICE, stock_code, start=start, end=end
+        ),
+        ScanIndexForward=not newest_first,
+    )
+
+    return [PriceChangeRow.from_item(item) for item in items], next_cursor
 
 
-def read_price_history_by_stock_code(table, market_uuid: str, stock_code: str):
+def read_latest_price_changes(
+        table,
+        market_uuid: str,
+        stock_code: str,
+        count: int,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+):
+    """Read the `count` most recent price changes of a stock, newest first, optionally only those after `since`."""
     response = table.query(
-        KeyConditionExpression=(
-                Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
-                Key("SK").begins_with(build_key(KeyComponents.PRICE, stock_code))
-        )
+        KeyConditionExpression=time_range_condition(
+            build_key(KeyComponents.MARKET, market_uuid), KeyComponents.PRICE, stock_code, start=since, end=until
+        ),
+        ScanIndexForward=False,
+        Limit=count,
     )
 
-    return [_item_to_model(item) for item in response["Items"]]
+    price_changes = [PriceChangeRow.from_item(item) for item in response["Items"]]
+
+    return [
+        price_change for price_change in price_changes
+        if since is None or price_change.timestamp > since
+    ]
+
+
+class _CandleState:
+    """
+    Candles of one stock at one interval built so far. Every candle but the last is final: its close is the price
+    left by its last change, known once a later change exists. The current one stays open until the next change.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.closed = []
+        self.current = None
+        self.settled_until = None
+
+    def copy(self) -> "_CandleState":
+        # Closed candles are never modified again, the copy shares them.
+        state = _CandleState()
+        state.closed = list(self.closed)
+        state.current = self.current.model_copy() if self.current is not None else None
+
+        return state
+
+    def add(self, stock_code: str, interval: datetime.timedelta, timestamp: datetime.datetime, previous_price):
+        start = _EPOCH + (timestamp - _EPOCH) // interval * interval
+
+        if self.current is not None:
+            # The price before this change is the price the previous change left behind.
+            self.current.high = max(self.current.high, previous_price)
+            self.current.low = min(self.current.low, previous_price)
+
+            if self.current.start == start:
+                self.current.changes += 1
+
+                return
+
+            self.current.close = previous_price
+            self.closed.append(self.current)
+
+        self.current = Candle(
+            stock_code=stock_code,
+            start=start,
+            open=previous_price,
+            high=previous_price,
+            low=previous_price,
+            close=previous_price,
+            changes=1,
+        )
+
+    def candles(self, current_price: decimal.Decimal):
+        if self.current is None:
+            return list(self.closed)
+
+        return [
+            *self.closed,
+            self.current.model_copy(update={
+                "high": max(self.current.high, current_price),
+                "low": min(self.current.low, current_price),
+                "close": current_price,
+            }),
+        ]
+
+
+# One state per market, stock and interval, the intervals are limited to the ones the router accepts. States of markets
+# nobody reads any more expire and are dropped first once the cache is full.
+_candle_states = TTLCache(float(os.environ.get("CANDLE_CACHE_SECONDS", "3600")), max_size=256)
+_candle_states_lock = threading.Lock()
+_CANDLE_OVERLAP = datetime.timedelta(seconds=CHANGES_OVERLAP_SECONDS)
+
+
+def read_price_candles(
+        table,
+        market_uuid: str,
+        stock_code: str,
+        interval: datetime.timedelta,
+        current_price: decimal.Decimal,
+) -> list[Candle]:
+    """
+    Aggregate the price history of a stock into open/high/low/close candles per `interval`.
+
+    The history is streamed page by page. Changes older than the overlap are settled into a state kept in memory
+    between calls, every call reads only the changes after it, so changes that became visible late are still counted.
+    """
+    key = (market_uuid, stock_code, interval)
+
+    with _candle_states_lock:
+        state = _candle_states.get(key)
+
+        if state is None:
+            state = _CandleState()
+            _candle_states.set(key, state)
+
+    with state.lock:
+        settle_before = datetime.datetime.now() - _CANDLE_OVERLAP
+        items = iterate_query(
+            table,
+            KeyConditionExpression=time_range_condition(
+                build_key(KeyComponents.MARKET, market_uuid), KeyComponents.PRICE, stock_code, start=state.settled_until
+            ),
+        )
+        recent = None
+
+        for item in items:
+            _, _, timestamp = explode_key(item["SK"])
+            timestamp = datetime.datetime.fromisoformat(timestamp)
+
+            if timestamp >= settle_before and recent is None:
+                recent = state.copy()
+
+            # Changes within the overlap only go into this call's copy, the next call reads them again.
+            (state if recent is None else recent).add(stock_code, interval, timestamp, item["PreviousPrice"])
+
+        state.settled_until = settle_before if state.settled_until is None else max(state.settled_until, settle_before)
+
+        return (state if recent is None else recent).candles(current_price)
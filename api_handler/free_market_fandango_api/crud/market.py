@@ -1,12 +1,16 @@
 import datetime
+import os
+import time
 from uuid import UUID
 
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
 
 from .setting import read_settings, update_setting
+from ..cache import TTLCache
 from ..constants import KeyComponents
+from ..rows import MarketBalanceRow, MarketPriceRow
 from ..schemas import Market, MarketBalance, MarketPrice
-from ..utils import build_key, explode_key, notify_cache_invalid_event
+from ..utils import build_key, iterate_query, notify_cache_invalid_event, query_page
 
 
 def _item_to_model(item):
@@ -18,43 +22,79 @@ def _item_to_model(item):
     )
 
 
+# The active market pointer and market details change a couple of times a night but are read on nearly every write
+# path. Market.active is computed from the cached closed_at, so a scheduled close still takes effect on time.
+_markets = TTLCache(float(os.environ.get("MARKET_CACHE_SECONDS", "5")))
+
+
+def _read_market_item(table, key):
+    response = table.get_item(Key=key)
+
+    if "Item" not in response:
+        return None
+
+    return _item_to_model(response["Item"])
+
+
+def _cached_market(table, cache_key, key):
+    market = _markets.get_or_load(cache_key, lambda: _read_market_item(table, key))
+
+    # Callers may modify the market they get back, keep the cached one untouched.
+    return market.model_copy() if market is not None else None
+
+
 def read_active_market(table):
-    response = table.get_item(
-        Key={
+    return _cached_market(
+        table,
+        KeyComponents.ACTIVE,
+        {
             "PK": KeyComponents.MARKET.value,
             "SK": KeyComponents.ACTIVE.value,
         }
     )
 
-    if "Item" not in response:
-        return None
-
-    return _item_to_model(response['Item'])
-
 
 def read_market(table, market_uuid: str):
-    response = table.get_item(
-        Key={
+    return _cached_market(
+        table,
+        str(market_uuid),
+        {
             'PK': build_key(KeyComponents.MARKET, market_uuid),
             'SK': KeyComponents.DETAILS.value,
         }
     )
 
-    if "Item" not in response:
-        return None
 
-    return _item_to_model(response["Item"])
+def market_cache_stats():
+    return _markets.stats()
 
 
-def read_market_balances(table, market_uuid: str):
-    response = table.query(
+def read_market_balances(table, market_uuid: str, limit: int | None = None, cursor: str | None = None):
+    items, next_cursor = query_page(
+        table,
+        limit,
+        cursor,
+        partition_key=build_key(KeyComponents.MARKET, market_uuid),
         KeyConditionExpression=(
                 Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
                 Key("SK").begins_with(KeyComponents.CARD.value)
         )
     )
 
-    return [MarketBalance(card_number=explode_key(item['SK'])[1], balance=item['Balance']) for item in response["Items"]]
+    return [MarketBalanceRow.from_item(item) for item in items], next_cursor
+
+
+def read_market_balances_since(table, market_uuid: str, since: datetime.datetime):
+    items = iterate_query(
+        table,
+        KeyConditionExpression=(
+                Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
+                Key("SK").begins_with(KeyComponents.CARD.value)
+        ),
+        FilterExpression=Attr("UpdatedAt").gt(since.isoformat()),
+    )
+
+    return [MarketBalanceRow.from_item(item) for item in items]
 
 
 def read_market_balance(table, market_uuid: str, card_number: int):
@@ -71,20 +111,19 @@ def read_market_balance(table, market_uuid: str, card_number: int):
     return MarketBalance(card_number=card_number, balance=response["Item"]['Balance'])
 
 
-def read_market_prices(table, market_uuid: str):
-    response = table.query(
+def read_market_prices(table, market_uuid: str, limit: int | None = None, cursor: str | None = None):
+    items, next_cursor = query_page(
+        table,
+        limit,
+        cursor,
+        partition_key=build_key(KeyComponents.MARKET, market_uuid),
         KeyConditionExpression=(
                 Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
                 Key("SK").begins_with(KeyComponents.STOCK.value)
         )
     )
 
-    def get_stock_code(item):
-        _, stock_code = explode_key(item['SK'])
-
-        return stock_code
-
-    return [MarketPrice(stock_code=get_stock_code(item), price=item['Price']) for item in response["Items"]]
+    return [MarketPriceRow.from_item(item) for item in items], next_cursor
 
 
 def read_market_price(table, market_uuid: str, stock_code: str):
@@ -101,6 +140,52 @@ def read_market_price(table, market_uuid: str, stock_code: str):
     return MarketPrice(stock_code=stock_code, price=response["Item"]['Price'])
 
 
+def read_purchase_details(table, market_uuid: str, stock_codes: list[str], card_numbers: list[int]):
+    market_key = build_key(KeyComponents.MARKET, market_uuid)
+    stock_codes = list(dict.fromkeys(stock_codes))
+    card_numbers = list(dict.fromkeys(card_numbers))
+
+    keys = [
+        {"PK": market_key, "SK": KeyComponents.DETAILS.value},
+        *({"PK": market_key, "SK": build_key(KeyComponents.STOCK, code)} for code in stock_codes),
+        *({"PK": market_key, "SK": build_key(KeyComponents.CARD, number)} for number in card_numbers),
+    ]
+    items = {}
+    attempt = 0
+
+    # Strongly consistent reads in one round trip. Unlike TransactGetItems they are not cancelled by the purchase
+    # transactions in flight, and the conditions of the purchase write reject anything that changes in between.
+    while keys:
+        response = table.meta.client.batch_get_item(
+            RequestItems={table.name: {"Keys": keys, "ConsistentRead": True}}
+        )
+
+        items.update((item["SK"], item) for item in response["Responses"].get(table.name, []))
+        keys = response.get("UnprocessedKeys", {}).get(table.name, {}).get("Keys", [])
+
+        if keys:
+            # Keys are left unprocessed when the table is throttled, back off before asking for them again.
+            time.sleep(0.05 * 2 ** attempt)
+            attempt += 1
+
+    market_item = items.get(KeyComponents.DETAILS.value)
+    price_items = [items.get(build_key(KeyComponents.STOCK, code)) for code in stock_codes]
+    balance_items = [items.get(build_key(KeyComponents.CARD, number)) for number in card_numbers]
+
+    prices = {
+        code: MarketPrice(stock_code=code, price=item["Price"])
+        for code, item in zip(stock_codes, price_items)
+        if item
+    }
+    balances = {
+        number: MarketBalance(card_number=number, balance=item["Balance"])
+        for number, item in zip(card_numbers, balance_items)
+        if item
+    }
+
+    return _item_to_model(market_item) if market_item else None, prices, balances
+
+
 def open_market(table, market: Market):
     current_settings = read_settings(table)
 
@@ -120,6 +205,8 @@ def open_market(table, market: Market):
             }
         )
 
+    _markets.invalidate(KeyComponents.ACTIVE)
+    _markets.invalidate(str(market.uuid))
     notify_cache_invalid_event(table, str(market.uuid))
 
     return market
@@ -154,4 +241,7 @@ def update_market(table, market: Market):
         }
     )
 
+    _markets.invalidate(KeyComponents.ACTIVE)
+    _markets.invalidate(market_uuid)
+
     return market
@@ -1,67 +1,207 @@
 import datetime
-import decimal
 
 from boto3.dynamodb.conditions import Key
 
+from .aggregate import aggregate_updates
 from ..constants import KeyComponents
 from ..schemas import PurchaseOut
-from ..utils import build_key, explode_key, notify_purchase_event
+from ..outbox import outbox_put
+from ..rows import PurchaseRow
+from ..utils import build_key, purchase_event, query_page, time_range_condition
 
 
-def _item_to_model(item):
-    _, card_number, timestamp = explode_key(item["SK"])
-
-    return PurchaseOut(
-        price=item["Price"],
-        stock_code=item["StockCode"],
-        card_number=card_number,
-        previous_balance=item["PreviousBalance"],
-        timestamp=datetime.datetime.fromisoformat(timestamp),
-    )
-
-
-def read_purchases(table, market_uuid: str):
-    response = table.query(
+def read_purchases(table, market_uuid: str, limit: int | None = None, cursor: str | None = None):
+    items, next_cursor = query_page(
+        table,
+        limit,
+        cursor,
+        partition_key=build_key(KeyComponents.MARKET, market_uuid),
         KeyConditionExpression=(
                 Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
                 Key("SK").begins_with(build_key(KeyComponents.PURCHASE))
         )
     )
 
-    return [_item_to_model(item) for item in response["Items"]]
-
-
-def read_purchases_by_card_number(table, market_uuid: str, card_number: int):
-    response = table.query(
-        KeyConditionExpression=(
-                Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
-                Key("SK").begins_with(build_key(KeyComponents.PURCHASE, card_number))
-        )
+    return [PurchaseRow.from_item(item) for item in items], next_cursor
+
+
+def read_purchases_by_card_number(
+        table,
+        market_uuid: str,
+        card_number: int,
+        limit: int | None = None,
+        cursor: str | None = None,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        newest_first: bool = False,
+):
+    items, next_cursor = query_page(
+        table,
+        limit,
+        cursor,
+        partition_key=build_key(KeyComponents.MARKET, market_uuid),
+        KeyConditionExpression=time_range_condition(
+            build_key(KeyComponents.MARKET, market_uuid), KeyComponents.PURCHASE, card_number, start=start, end=end
+        ),
+        ScanIndexForward=not newest_first,
     )
 
-    return [_item_to_model(item) for item in response["Items"]]
-
-
-def create_purchase(table, market_uuid: str, purchase: PurchaseOut, new_balance: decimal.Decimal) -> PurchaseOut:
-    with table.batch_writer() as batch:
-        batch.put_item(
-            Item={
-                'PK': build_key(KeyComponents.MARKET, market_uuid),
-                'SK': build_key(KeyComponents.CARD, purchase.card_number),
-                'Balance': new_balance,
-            }
-        )
-
-        table.put_item(
-            Item={
-                "PK": build_key(KeyComponents.MARKET, market_uuid),
-                "SK": build_key(KeyComponents.PURCHASE, purchase.card_number, purchase.timestamp.isoformat()),
-                "StockCode": purchase.stock_code,
-                "PreviousBalance": purchase.previous_balance,
-                "Price": purchase.price,
-            }
-        )
-
-    notify_purchase_event(market_uuid, purchase.stock_code)
-
-    return purchase
+    return [PurchaseRow.from_item(item) for item in items], next_cursor
+
+
+PURCHASE_CONFLICT = "Purchase conflicted with another purchase, please submit again"
+
+
+class PurchaseRejected(Exception):
+    """
+    The purchases were not committed. `rejected` maps the index of every purchase a failed condition applies to onto
+    the reason, it is empty when the transaction only conflicted with another one and can simply be submitted again.
+    """
+
+    def __init__(self, detail: str, rejected: dict[int, str]):
+        super().__init__(detail)
+
+        self.detail = detail
+        self.rejected = rejected
+
+
+def _write_transaction(table, actions):
+    """
+    Commit (action, rejection detail, indexes of the purchases it checks) triples as one transaction, raising
+    PurchaseRejected with the purchases whose conditions failed.
+    """
+    try:
+        table.meta.client.transact_write_items(TransactItems=[action for action, _, _ in actions])
+    except table.meta.client.exceptions.TransactionCanceledException as exc:
+        reasons = [reason.get("Code") for reason in exc.response.get("CancellationReasons", [])]
+        rejected = {}
+
+        for code, (_, detail, indexes) in zip(reasons, actions):
+            if code == "ConditionalCheckFailed":
+                for index in indexes:
+                    rejected.setdefault(index, detail)
+
+        if rejected:
+            raise PurchaseRejected(next(iter(rejected.values())), rejected)
+
+        if "TransactionConflict" in reasons:
+            raise PurchaseRejected(PURCHASE_CONFLICT, {})
+
+        raise
+
+
+def create_purchases(table, market_uuid: str, purchases: list[PurchaseOut]) -> list[PurchaseOut]:
+    market_key = build_key(KeyComponents.MARKET, market_uuid)
+
+    prices = {}
+    card_balances = {}
+    now = datetime.datetime.now().isoformat()
+
+    for purchase in purchases:
+        prices.setdefault(purchase.stock_code, purchase.price)
+        previous_balance, spend = card_balances.get(purchase.card_number, (purchase.previous_balance, 0))
+        card_balances[purchase.card_number] = (previous_balance, spend + purchase.price)
+
+    # The purchases are committed without re-reading anything: the conditions guarantee the market is still open, the
+    # prices the customers were shown are still current and the balances the purchases were validated against are
+    # unchanged (so they are still sufficient and PreviousBalance is exact), even when two terminals charge the same
+    # card at once. Several purchases on one card are folded into a single balance update.
+    all_indexes = range(len(purchases))
+
+    def indexes_where(**attributes):
+        return [
+            index for index, purchase in enumerate(purchases)
+            if all(getattr(purchase, name) == value for name, value in attributes.items())
+        ]
+
+    actions = [
+        (
+            {
+                "ConditionCheck": {
+                    "TableName": table.name,
+                    "Key": {"PK": market_key, "SK": KeyComponents.DETAILS.value},
+                    "ConditionExpression": (
+                        "attribute_not_exists(ClosedAt) OR attribute_type(ClosedAt, :null) OR ClosedAt > :now"
+                    ),
+                    "ExpressionAttributeValues": {
+                        ":null": "NULL",
+                        ":now": now,
+                    },
+                }
+            },
+            "Market is closed",
+            all_indexes,
+        ),
+        *(
+            (
+                {
+                    "ConditionCheck": {
+                        "TableName": table.name,
+                        "Key": {"PK": market_key, "SK": build_key(KeyComponents.STOCK, stock_code)},
+                        "ConditionExpression": "Price = :price",
+                        "ExpressionAttributeValues": {":price": price},
+                    }
+                },
+                "Stock price has changed, please refresh and submit again",
+                indexes_where(stock_code=stock_code),
+            )
+            for stock_code, price in prices.items()
+        ),
+        *(
+            (
+                {
+                    "Update": {
+                        "TableName": table.name,
+                        "Key": {"PK": market_key, "SK": build_key(KeyComponents.CARD, card_number)},
+                        # UpdatedAt lets delta sync clients fetch only the balances that changed.
+                        "UpdateExpression": "SET Balance = Balance - :spend, UpdatedAt = :now",
+                        "ConditionExpression": "Balance = :previous_balance AND Balance >= :spend",
+                        "ExpressionAttributeValues": {
+                            ":spend": spend,
+                            ":previous_balance": previous_balance,
+                            ":now": now,
+                        },
+                    }
+                },
+                "Card balance has changed, please submit again",
+                indexes_where(card_number=card_number),
+            )
+            for card_number, (previous_balance, spend) in card_balances.items()
+        ),
+        *(
+            (
+                {
+                    "Put": {
+                        "TableName": table.name,
+                        "Item": {
+                            "PK": market_key,
+                            "SK": build_key(
+                                KeyComponents.PURCHASE, purchase.card_number, purchase.timestamp.isoformat()
+                            ),
+                            "StockCode": purchase.stock_code,
+                            "PreviousBalance": purchase.previous_balance,
+                            "Price": purchase.price,
+                        },
+                        "ConditionExpression": "attribute_not_exists(SK)",
+                    }
+                },
+                "Purchase has already been recorded",
+                [index],
+            )
+            for index, purchase in enumerate(purchases)
+        ),
+        *((update, None, []) for update in aggregate_updates(table, market_uuid, purchases)),
+        # The purchase events are published from the outbox after the commit, keeping SQS off the purchase path.
+        *(
+            (outbox_put(table, market_uuid, *purchase_event(market_uuid, stock_code)), None, [])
+            for stock_code in prices
+        ),
+    ]
+
+    _write_transaction(table, actions)
+
+    return purchases
+
+
+def create_purchase(table, market_uuid: str, purchase: PurchaseOut) -> PurchaseOut:
+    return create_purchases(table, market_uuid, [purchase])[0]
@@ -1,31 +1,38 @@
+import os
+
 from boto3.dynamodb.conditions import Key
 
+from ..cache import TTLCache
 from ..constants import Settings, setting_defaults
 from ..schemas import Setting
+from ..utils import iterate_query
 
 KEY = "Setting"
 
+_settings = TTLCache(float(os.environ.get("SETTINGS_CACHE_SECONDS", "30")), max_size=1)
 
-def _item_to_model(item):
-    return Setting(key=item["SK"], value=item["Value"])
 
+def _load_setting_values(table) -> dict[Settings, int]:
+    values = dict(setting_defaults)
 
-def _setting_or_default(response, setting: Settings):
-    stored_setting = next(
-        (item for item in response["Items"] if item["SK"] == setting.value), None
-    )
+    for item in iterate_query(table, KeyConditionExpression=Key("PK").eq(KEY)):
+        try:
+            values[Settings(item["SK"])] = int(item["Value"])
+        except ValueError:
+            # Settings that are no longer defined are ignored, as before.
+            continue
 
-    return (
-        Setting(key=setting.value, value=setting_defaults[setting])
-        if stored_setting is None
-        else _item_to_model(stored_setting)
-    )
+    return values
+
+
+def read_setting_values(table) -> dict[Settings, int]:
+    return dict(_settings.get_or_load(KEY, lambda: _load_setting_values(table)))
 
 
 def read_settings(table):
-    response = table.query(KeyConditionExpression=Key("PK").eq(KEY))
+    values = read_setting_values(table)
 
-    return [_setting_or_default(response, setting) for setting in Settings]
+    return [Setting(key=setting, value=values[setting]) for setting in Settings]
 
 
 def update_setting(batch, setting: Setting):
@@ -43,4 +50,6 @@ def update_settings(table, settings: list[Setting]):
         for setting in settings:
             update_setting(batch, setting)
 
+    _settings.invalidate()
+
     return settings
@@ -1,5 +1,4 @@
-from boto3.dynamodb.conditions import Key
-
+from .catalog import CatalogCache
 from ..schemas import Stock
 from ..constants import KeyComponents
 from ..utils import notify_cache_invalid_event
@@ -14,50 +13,53 @@ def _item_to_model(item) -> Stock:
     )
 
 
+_stocks = CatalogCache(KeyComponents.STOCK, _item_to_model)
+
+
+def _model_to_item(stock: Stock):
+    return {
+        "PK": KeyComponents.STOCK.value,
+        "SK": stock.code,
+        "Name": stock.name,
+        "InitialPrice": stock.initial_price,
+        "Tags": stock.tags,
+    }
+
+
 def read_stock(table, stock_code: str) -> Stock | None:
-    response = table.get_item(
-        Key={
-            "PK": KeyComponents.STOCK.value,
-            "SK": stock_code,
-        }
-    )
+    return _stocks.read(table, stock_code)
 
-    if "Item" not in response:
-        return None
 
-    return _item_to_model(response["Item"])
+def read_stocks(table, limit: int | None = None, cursor: str | None = None) -> tuple[list[Stock], str | None]:
+    return _stocks.read_page(table, limit, cursor)
 
 
-def read_stocks(table) -> list[Stock]:
-    response = table.query(
-        KeyConditionExpression=Key("PK").eq(KeyComponents.STOCK.value)
-    )
+def stocks_exist(table) -> bool:
+    return _stocks.exists(table)
 
-    return [_item_to_model(item) for item in response["Items"]]
 
+def count_stocks(table) -> int:
+    return _stocks.count(table)
 
-def create_stock(table, stock: Stock) -> Stock:
-    table.put_item(
-        Item={
-            "PK": KeyComponents.STOCK.value,
-            "SK": stock.code,
-            "Name": stock.name,
-            "InitialPrice": stock.initial_price,
-            "Tags": stock.tags,
-        }
-    )
 
+def create_stock(table, stock: Stock) -> Stock:
+    _stocks.put(table, _model_to_item(stock))
     notify_cache_invalid_event(table)
 
     return stock
 
 
-def delete_stock(table, stock_code: str) -> None:
-    table.delete_item(
-        Key={
-            "PK": KeyComponents.STOCK.value,
-            "SK": stock_code,
-        }
-    )
+def create_stocks(table, stocks: list[Stock]) -> list[Stock]:
+    with table.batch_writer() as batch:
+        for stock in stocks:
+            batch.put_item(Item=_model_to_item(stock))
+
+    _stocks.bump(table)
+    notify_cache_invalid_event(table)
+
+    return stocks
 
+
+def delete_stock(table, stock_code: str) -> None:
+    _stocks.delete(table, stock_code)
     notify_cache_invalid_event(table)
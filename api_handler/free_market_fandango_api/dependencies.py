@@ -1,19 +1,23 @@
+import datetime
 import os
+from dataclasses import dataclass
 from typing import Annotated
 
-import boto3
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, Query
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from starlette import status
 
-from .constants import ALGORITHM
+from .aws import get_dynamodb_table
+from .constants import ALGORITHM, MAX_PAGE_SIZE
+from .utils import decode_cursor
 
-table_name = os.environ["DYNAMODB_TABLE_ARN"]
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 async def validate_jwt(token: Annotated[str, Depends(oauth2_scheme)]):
+    # jose pulls in its crypto backends, import it on the first authenticated request rather than at cold start.
+    from jose import JWTError, jwt
+
     try:
         jwt.decode(token, os.environ["SECRET_KEY"], algorithms=[ALGORITHM])
     except JWTError:
@@ -24,9 +28,62 @@ async def validate_jwt(token: Annotated[str, Depends(oauth2_scheme)]):
         )
 
 
-def get_table():
-    dynamodb = boto3.resource("dynamodb")
+@dataclass
+class Page:
+    limit: int
+    cursor: str | None
+
+
+def get_page(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = MAX_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    if cursor is not None:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor",
+            )
+
+    return Page(limit=limit, cursor=cursor)
+
+
+@dataclass
+class TimeRange:
+    start: datetime.datetime | None
+    end: datetime.datetime | None
+    latest: int | None
+
+
+def as_local_time(value: datetime.datetime | None):
+    # Sort keys hold naive local timestamps, compare them against the same.
+    if value is None or value.tzinfo is None:
+        return value
 
-    table = dynamodb.Table(table_name)
+    return value.astimezone().replace(tzinfo=None)
 
-    return table
+
+def get_time_range(
+        start: Annotated[datetime.datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime.datetime | None, Query(alias="to")] = None,
+        latest: Annotated[
+            int | None,
+            Query(ge=1, le=MAX_PAGE_SIZE, description="Only the N most recent items, newest first."),
+        ] = None,
+):
+    start, end = as_local_time(start), as_local_time(end)
+
+    # DynamoDB rejects a BETWEEN whose lower bound is above the upper one.
+    if start is not None and end is not None and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The from time must not be after the to time",
+        )
+
+    return TimeRange(start=start, end=end, latest=latest)
+
+
+def get_table():
+    return get_dynamodb_table()
@@ -0,0 +1,137 @@
+import csv
+import io
+import zlib
+
+from boto3.dynamodb.conditions import Key
+from pydantic_core import to_json
+
+from .constants import KeyComponents
+from .utils import build_key, explode_key, iterate_query
+
+_CHUNK_SIZE = 64 * 1024
+
+# One set of columns for every row type, CSV rows leave the columns of the other types empty.
+_COLUMNS = (
+    "type",
+    "card_number",
+    "stock_code",
+    "price",
+    "previous_balance",
+    "previous_price",
+    "reason",
+    "balance",
+    "timestamp",
+)
+
+
+def _purchase_row(item):
+    _, card_number, timestamp = explode_key(item["SK"])
+
+    return {
+        "type": "purchase",
+        "card_number": int(card_number),
+        "stock_code": item["StockCode"],
+        "price": item["Price"],
+        "previous_balance": item["PreviousBalance"],
+        "timestamp": timestamp,
+    }
+
+
+def _price_change_row(item):
+    _, stock_code, timestamp = explode_key(item["SK"])
+
+    return {
+        "type": "price_change",
+        "stock_code": stock_code,
+        "previous_price": item["PreviousPrice"],
+        "reason": item["Reason"],
+        "timestamp": timestamp,
+    }
+
+
+def _balance_row(item):
+    _, card_number = explode_key(item["SK"])
+
+    return {
+        "type": "balance",
+        "card_number": int(card_number),
+        "balance": item["Balance"],
+    }
+
+
+def export_rows(table, market_uuid: str):
+    """Yield the purchases, price history and final balances of a market, reading one page at a time."""
+    for prefix, item_to_row in (
+            (KeyComponents.PURCHASE, _purchase_row),
+            (KeyComponents.PRICE, _price_change_row),
+            (KeyComponents.CARD, _balance_row),
+    ):
+        items = iterate_query(
+            table,
+            KeyConditionExpression=(
+                    Key("PK").eq(build_key(KeyComponents.MARKET, market_uuid)) &
+                    Key("SK").begins_with(build_key(prefix, ""))
+            ),
+        )
+
+        for item in items:
+            yield item_to_row(item)
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield to_json(row) + b"\n"
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_COLUMNS)
+
+    writer.writeheader()
+
+    for row in rows:
+        writer.writerow(row)
+
+        yield buffer.getvalue().encode()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _chunks(lines):
+    chunk = bytearray()
+
+    for line in lines:
+        chunk += line
+
+        if len(chunk) >= _CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield bytes(chunk)
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=31)
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_market(table, market_uuid: str, export_format: str, compress: bool = False):
+    lines = _ndjson_lines if export_format == "ndjson" else _csv_lines
+    chunks = _chunks(lines(export_rows(table, market_uuid)))
+
+    return _gzip(chunks) if compress else chunks
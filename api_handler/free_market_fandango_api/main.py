@@ -1,11 +1,16 @@
 from fastapi import FastAPI
 from mangum import Mangum
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException
 from starlette.responses import JSONResponse
 
+from .constants import NEXT_CURSOR_HEADER
+from .openapi import load_openapi
 from .schemas import APIError
-from .routers import auth, card, event, history, market, purchase, setting, stock, spotify
+from .utils import InvalidCursor, buffered_notifications
+from .warmup import with_warmup
+from .routers import aggregate, auth, card, event, history, market, purchase, setting, stats, stock, spotify
 
 app = FastAPI(
     title="Free Market Fandango",
@@ -33,8 +38,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+app.include_router(aggregate.router)
 app.include_router(auth.router)
 app.include_router(card.router)
 app.include_router(event.router)
@@ -42,9 +49,31 @@ app.include_router(history.router)
 app.include_router(purchase.router)
 app.include_router(market.router)
 app.include_router(setting.router)
+app.include_router(stats.router)
 app.include_router(stock.router)
 app.include_router(spotify.router)
 
+app.openapi_schema = load_openapi()
+
+
+@app.middleware("http")
+async def dispatch_notifications(request, call_next):
+    with buffered_notifications() as notifications:
+        try:
+            return await call_next(request)
+        finally:
+            # Most requests notify nothing, they skip the hop to the threadpool.
+            if notifications.pending:
+                await run_in_threadpool(notifications.flush)
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request, exc):
+    return JSONResponse(
+            status_code=400,
+            content=APIError(message=str(exc)).model_dump()
+        )
+
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -54,4 +83,4 @@ async def http_exception_handler(request, exc):
         )
 
 
-handler = Mangum(app, lifespan="off")
+handler = with_warmup(Mangum(app, lifespan="off"))
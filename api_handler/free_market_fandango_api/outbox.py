@@ -0,0 +1,162 @@
+import datetime
+import logging
+import os
+from itertools import groupby
+from uuid import uuid4
+
+from boto3.dynamodb.conditions import Key
+
+from .aws import get_dynamodb_table
+from .constants import KeyComponents
+from .utils import build_key, explode_key, iterate_query, send_sqs_batch, sqs_batches, sqs_message
+
+logger = logging.getLogger(__name__)
+
+_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "5"))
+
+
+def outbox_put(table, market_uuid: str, message_body: str, message_attributes: dict):
+    """
+    Build a TransactWriteItems Put that records an SQS message in the outbox, so it is published if and only if the
+    rest of the transaction commits.
+    """
+    message_id = str(uuid4())
+
+    return {
+        "Put": {
+            "TableName": table.name,
+            "Item": {
+                "PK": KeyComponents.OUTBOX.value,
+                # Sorting by market then time keeps the messages of each market in the order they were written.
+                "SK": build_key(market_uuid, datetime.datetime.now().isoformat(), message_id),
+                "MessageId": message_id,
+                "MessageBody": message_body,
+                "MessageAttributes": message_attributes,
+                "Attempts": 0,
+            },
+        }
+    }
+
+
+class OutboxDrainer:
+    """
+    Publishes outbox items to SQS in order for each market and deletes them once they have been accepted. An item SQS
+    keeps refusing is moved to the dead letter partition after `max_attempts` drains, so it cannot hold back the rest
+    of its market.
+    """
+
+    def __init__(self, table, max_attempts: int = _MAX_ATTEMPTS):
+        self._table = table
+        self._max_attempts = max_attempts
+
+    def drain(self, market_uuid: str | None = None) -> int:
+        condition = Key("PK").eq(KeyComponents.OUTBOX.value)
+
+        if market_uuid is not None:
+            condition &= Key("SK").begins_with(build_key(market_uuid, ""))
+
+        items = iterate_query(self._table, KeyConditionExpression=condition, ConsistentRead=True)
+
+        published = 0
+
+        for _, market_items in groupby(items, key=lambda item: explode_key(item["SK"])[0]):
+            published += self._drain_market(list(market_items))
+
+        return published
+
+    def _drain_market(self, items) -> int:
+        published = 0
+
+        for batch in sqs_batches(items):
+            # A stable deduplication ID lets SQS drop the copy if an item is published again because deleting it
+            # failed or two drains overlapped.
+            failed = send_sqs_batch(
+                [sqs_message(item["MessageBody"], item["MessageAttributes"], item["MessageId"]) for item in batch]
+            )
+            sent = batch[:failed[0]] if failed else batch
+
+            with self._table.batch_writer() as writer:
+                for item in sent:
+                    writer.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
+
+            published += len(sent)
+
+            if failed:
+                # Only the messages before the first failure are removed, the next drain retries the rest in order.
+                self._record_failure(batch[failed[0]])
+
+                break
+
+        return published
+
+    def _record_failure(self, item):
+        key = {"PK": item["PK"], "SK": item["SK"]}
+
+        if item["Attempts"] + 1 < self._max_attempts:
+            self._table.update_item(
+                Key=key,
+                UpdateExpression="ADD Attempts :one",
+                ExpressionAttributeValues={":one": 1},
+            )
+
+            return
+
+        logger.error(
+            "Moving outbox item %s to the dead letter partition after %s attempts", item["SK"], self._max_attempts
+        )
+
+        self._table.meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    "Put": {
+                        "TableName": self._table.name,
+                        "Item": {
+                            **item,
+                            "PK": KeyComponents.OUTBOX_DEAD_LETTER.value,
+                            "Attempts": item["Attempts"] + 1,
+                        },
+                    }
+                },
+                {"Delete": {"TableName": self._table.name, "Key": key}},
+            ]
+        )
+
+
+def drain_outbox(market_uuid: str | None = None) -> int:
+    return OutboxDrainer(get_dynamodb_table()).drain(market_uuid)
+
+
+def drain_outbox_quietly(market_uuid: str):
+    """
+    Publish a market's outbox once the response to its purchases was sent, when running behind a regular ASGI server.
+    Failures are only logged, the items stay in the outbox for the next drain.
+    """
+    try:
+        drain_outbox(market_uuid)
+    except Exception:
+        logger.warning("Draining the outbox of market %s failed", market_uuid, exc_info=True)
+
+
+def _stream_markets(records) -> list[str]:
+    """The markets with outbox items inserted in a batch of DynamoDB stream records, in the order they appear."""
+    markets = {}
+
+    for record in records:
+        keys = record.get("dynamodb", {}).get("Keys", {})
+
+        if record.get("eventName") == "INSERT" and keys.get("PK", {}).get("S") == KeyComponents.OUTBOX.value:
+            markets.setdefault(explode_key(keys["SK"]["S"])[0], None)
+
+    return list(markets)
+
+
+def handler(event, context):
+    """
+    Publishes the outbox outside the request path. Deployed with the table's stream as its trigger (filtered on
+    PK = Outbox, new items only) it drains the markets purchases were just written for, invoked on a schedule or with
+    any other event it drains every market.
+    """
+    if isinstance(event, dict) and "Records" in event:
+        return {"published": sum(drain_outbox(market_uuid) for market_uuid in _stream_markets(event["Records"]))}
+
+    return {"published": drain_outbox()}
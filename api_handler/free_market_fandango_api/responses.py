@@ -0,0 +1,53 @@
+import hashlib
+from functools import lru_cache
+
+from pydantic import TypeAdapter
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .constants import NEXT_CURSOR_HEADER
+
+
+@lru_cache
+def _adapter(content_type) -> TypeAdapter:
+    return TypeAdapter(content_type)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+
+    # If-None-Match uses the weak comparison, a W/ prefix does not prevent a match.
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+
+    return "*" in candidates or etag in candidates
+
+
+def conditional_json_response(request: Request, content, content_type, headers: dict | None = None) -> Response:
+    """
+    Serialize `content` as `content_type` with a strong ETag of the body, answering 304 Not Modified when the client
+    already holds the same representation.
+    """
+    body = _adapter(content_type).dump_json(content)
+    headers = {
+        **(headers or {}),
+        "ETag": f'"{hashlib.sha256(body).hexdigest()}"',
+        "Cache-Control": "no-cache",
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def json_response(content, content_type, headers: dict | None = None) -> Response:
+    """
+    Serialize `content`, already validated models, as `content_type` in a single pass. Returning the Response directly
+    skips FastAPI validating the content against the route's response_model again.
+    """
+    return Response(_adapter(content_type).dump_json(content), media_type="application/json", headers=headers)
+
+
+def page_response(content, content_type, next_cursor: str | None) -> Response:
+    return json_response(content, content_type, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor is not None else None)
@@ -0,0 +1,77 @@
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette import status
+
+from ..crud import aggregate
+from ..dependencies import get_table
+from ..schemas import CardAggregate, StockAggregate, APIError
+
+router = APIRouter(
+    prefix="/market/{market_uuid}/aggregate",
+    tags=["aggregates"],
+)
+
+
+@router.get(
+    "/stock",
+    response_model=list[StockAggregate],
+)
+def read_stock_aggregates(
+        market_uuid: str,
+        sort_by: Literal["count", "revenue"] | None = None,
+        top: Annotated[int | None, Query(ge=1)] = None,
+        table=Depends(get_table),
+):
+    return aggregate.read_stock_aggregates(table, market_uuid, sort_by, top)
+
+
+@router.get(
+    "/stock/{stock_code}",
+    response_model=StockAggregate,
+    responses={
+        404: {
+            "description": "No purchases of this stock.",
+            "model": APIError,
+        },
+    },
+)
+def read_stock_aggregate(market_uuid: str, stock_code: str, table=Depends(get_table)):
+    result = aggregate.read_stock_aggregate(table, market_uuid, stock_code)
+
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No purchases of this stock")
+
+    return result
+
+
+@router.get(
+    "/card",
+    response_model=list[CardAggregate],
+)
+def read_card_aggregates(
+        market_uuid: str,
+        sort_by: Literal["count", "spend"] | None = None,
+        top: Annotated[int | None, Query(ge=1)] = None,
+        table=Depends(get_table),
+):
+    return aggregate.read_card_aggregates(table, market_uuid, sort_by, top)
+
+
+@router.get(
+    "/card/{card_number}",
+    response_model=CardAggregate,
+    responses={
+        404: {
+            "description": "No purchases on this card.",
+            "model": APIError,
+        },
+    },
+)
+def read_card_aggregate(market_uuid: str, card_number: int, table=Depends(get_table)):
+    result = aggregate.read_card_aggregate(table, market_uuid, card_number)
+
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No purchases on this card")
+
+    return result
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, HTTPException
 from starlette.responses import Response
 from starlette.status import HTTP_204_NO_CONTENT
 
+from ..constants import MAX_BULK_IMPORT
 from ..crud import card
-from ..dependencies import get_table, validate_jwt
+from ..dependencies import Page, get_page, get_table, validate_jwt
+from ..responses import page_response
 from ..schemas import Card, APIError
 
 router = APIRouter(
     prefix="/card",
     tags=["cards"],
-    dependencies=[Depends(get_table)],
 )
 
 
@@ -17,8 +20,10 @@ router = APIRouter(
     "",
     response_model=list[Card],
 )
-def read_cards(table=Depends(get_table)):
-    return card.read_cards(table)
+def read_cards(page: Page = Depends(get_page), table=Depends(get_table)):
+    cards, next_cursor = card.read_cards(table, page.limit, page.cursor)
+
+    return page_response(cards, list[Card], next_cursor)
 
 
 @router.get(
@@ -59,6 +64,31 @@ def update_card(card_model: Card, table=Depends(get_table)):
     return card.update_card(table, card_model)
 
 
+@router.put(
+    "/batch",
+    response_model=list[Card],
+    dependencies=[Depends(validate_jwt)],
+    responses={
+        400: {
+            "description": "The same card number appears more than once.",
+            "model": APIError,
+        },
+        401: {
+            "description": "Failed to validate credentials.",
+            "model": APIError,
+        },
+    }
+)
+def update_cards(
+        card_models: Annotated[list[Card], Body(min_length=1, max_length=MAX_BULK_IMPORT)],
+        table=Depends(get_table),
+):
+    if len({card_model.card_number for card_model in card_models}) != len(card_models):
+        raise HTTPException(status_code=400, detail="Card numbers must be unique")
+
+    return card.update_cards(table, card_models)
+
+
 @router.delete(
     "/{card_number}",
     dependencies=[Depends(validate_jwt)],
@@ -1,19 +1,21 @@
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends
 from starlette import status
 from starlette.exceptions import HTTPException
 from starlette.responses import Response
 from starlette.status import HTTP_204_NO_CONTENT
 
+from ..constants import MAX_BULK_IMPORT
 from ..crud import event
-from ..dependencies import get_table, validate_jwt
+from ..dependencies import Page, get_page, get_table, validate_jwt
+from ..responses import page_response
 from ..schemas import EventIn, EventOut, APIError
 
 router = APIRouter(
     prefix="/event",
     tags=["events"],
-    dependencies=[Depends(get_table)],
 )
 
 
@@ -32,12 +34,32 @@ def create_event(new_event: EventIn, table=Depends(get_table)):
     return event.update_event(table, new_event)
 
 
+@router.put(
+    "/batch",
+    response_model=list[EventOut],
+    dependencies=[Depends(validate_jwt)],
+    responses={
+        401: {
+            "description": "Failed to validate credentials.",
+            "model": APIError,
+        },
+    }
+)
+def create_events(
+        new_events: Annotated[list[EventIn], Body(min_length=1, max_length=MAX_BULK_IMPORT)],
+        table=Depends(get_table),
+):
+    return event.update_events(table, new_events)
+
+
 @router.get(
     "",
     response_model=list[EventOut]
 )
-def read_events(table=Depends(get_table)):
-    return event.read_events(table)
+def read_events(page: Page = Depends(get_page), table=Depends(get_table)):
+    events, next_cursor = event.read_events(table, page.limit, page.cursor)
+
+    return page_response(events, list[EventOut], next_cursor)
 
 
 @router.get(
@@ -1,27 +1,118 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import datetime
+from typing import Annotated, Literal
 
-from ..crud import history
-from ..dependencies import get_table
-from ..schemas import PriceChange
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette import status
+
+from ..crud import aio, history, market
+from ..dependencies import Page, TimeRange, get_page, get_table, get_time_range
+from ..responses import page_response
+from ..rows import PriceChangeRow
+from ..schemas import Candle, PriceChange, APIError
+
+CandleInterval = Literal["1m", "5m", "15m", "30m", "1h", "4h", "1d"]
+
+# Candles are cached per interval, only these are accepted. Keep in line with CandleInterval.
+_INTERVALS = {
+    "1m": datetime.timedelta(minutes=1),
+    "5m": datetime.timedelta(minutes=5),
+    "15m": datetime.timedelta(minutes=15),
+    "30m": datetime.timedelta(minutes=30),
+    "1h": datetime.timedelta(hours=1),
+    "4h": datetime.timedelta(hours=4),
+    "1d": datetime.timedelta(days=1),
+}
 
 router = APIRouter(
     prefix="/market/{market_uuid}/history",
     tags=["history"],
-    dependencies=[Depends(get_table)],
 )
 
 
+def get_interval(
+        interval: Annotated[CandleInterval, Query()] = "1m",
+) -> datetime.timedelta:
+    return _INTERVALS[interval]
+
+
+@router.get(
+    "/candles",
+    response_model=list[Candle],
+)
+async def read_candles(
+        market_uuid: str,
+        interval: datetime.timedelta = Depends(get_interval),
+        table=Depends(get_table),
+):
+    prices, _ = await aio.read_market_prices(table, market_uuid)
+
+    # The candles of every stock are read concurrently rather than one stock after another.
+    candles = await asyncio.gather(
+        *(aio.read_price_candles(table, market_uuid, price.stock_code, interval, price.price) for price in prices)
+    )
+
+    return [candle for stock_candles in candles for candle in stock_candles]
+
+
+@router.get(
+    "/{stock_code}/candles",
+    response_model=list[Candle],
+    responses={
+        404: {
+            "description": "Stock does not exist.",
+            "model": APIError,
+        },
+    },
+)
+def read_candles_for_stock(
+        market_uuid: str,
+        stock_code: str,
+        interval: datetime.timedelta = Depends(get_interval),
+        table=Depends(get_table),
+):
+    price = market.read_market_price(table, market_uuid, stock_code)
+
+    if price is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stock does not exist")
+
+    return history.read_price_candles(table, market_uuid, stock_code, interval, price.price)
+
+
 @router.get(
     "/{stock_code}",
     response_model=list[PriceChange]
 )
-def read_price_history_for_stock(market_uuid: str, stock_code: str, table=Depends(get_table)):
-    return history.read_price_history_by_stock_code(table, market_uuid, stock_code)
+def read_price_history_for_stock(
+        market_uuid: str,
+        stock_code: str,
+        page: Page = Depends(get_page),
+        time_range: TimeRange = Depends(get_time_range),
+        table=Depends(get_table),
+):
+    price_changes, next_cursor = history.read_price_history_by_stock_code(
+        table,
+        market_uuid,
+        stock_code,
+        time_range.latest or page.limit,
+        page.cursor,
+        time_range.start,
+        time_range.end,
+        newest_first=time_range.latest is not None,
+    )
+
+    return page_response(price_changes, list[PriceChangeRow], next_cursor)
 
 
 @router.get(
     "",
     response_model=list[PriceChange]
 )
-def read_price_history(market_uuid: str, table=Depends(get_table)):
-    return history.read_price_history(table, market_uuid)
+def read_price_history(
+        market_uuid: str,
+        page: Page = Depends(get_page),
+        table=Depends(get_table),
+):
+    price_changes, next_cursor = history.read_price_history(table, market_uuid, page.limit, page.cursor)
+
+    return page_response(price_changes, list[PriceChangeRow], next_cursor)
@@ -1,16 +1,29 @@
+import asyncio
+import base64
 import datetime
+import json
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 
-from ..crud import market, card, event, stock
-from ..dependencies import get_table, validate_jwt
-from ..schemas import Market, MarketBalance, MarketPrice, APIError
+from ..constants import CHANGES_OVERLAP_SECONDS, MAX_CHANGES_WAIT_SECONDS, MAX_SNAPSHOT_HISTORY, NEXT_CURSOR_HEADER
+from ..crud import aio, market
+from ..dependencies import Page, as_local_time, get_page, get_table, validate_jwt
+from ..export import EXPORT_MEDIA_TYPES, export_market
+from ..responses import conditional_json_response
+from ..rows import MarketBalanceRow, MarketPriceRow
+from ..schemas import Market, MarketBalance, MarketChanges, MarketPrice, MarketSnapshot, SnapshotStock, APIError
+from ..stream import market_change_generation, market_change_watcher, market_events
+
+# Lambda responses are limited to 6 MB and Mangum base64 encodes binary bodies, such as gzip or ndjson.
+_LAMBDA_MAX_EXPORT_BYTES = 4 * 1024 * 1024
 
 router = APIRouter(
     prefix="/market",
     tags=["markets"],
-    dependencies=[Depends(get_table)],
 )
 
 
@@ -48,11 +61,16 @@ def read_active_market(table=Depends(get_table)):
         }
     }
 )
-def open_market(table=Depends(get_table)):
-    active_market = market.read_active_market(table)
+async def open_market(table=Depends(get_table)):
+    active_market, has_cards, has_stocks, has_events = await asyncio.gather(
+        aio.read_active_market(table),
+        aio.cards_exist(table),
+        aio.stocks_exist(table),
+        aio.events_exist(table),
+    )
 
     if active_market is not None:
-        current_market = market.read_market(table, active_market.uuid)
+        current_market = await aio.read_market(table, active_market.uuid)
 
         if current_market.active:
             raise HTTPException(
@@ -60,34 +78,25 @@ def open_market(table=Depends(get_table)):
                 detail="A market has never been opened"
             )
 
-    cards = card.read_cards(table)
-
-    if not cards:
+    if not has_cards:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No cards have been created"
         )
 
-    stocks = stock.read_stocks(table)
-
-    if not stocks:
+    if not has_stocks:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No stocks have been created"
         )
 
-    events = event.read_events(table)
-
-    if not events:
+    if not has_events:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No events have been created"
         )
 
-    return market.open_market(
-        table,
-        Market()
-    )
+    return await aio.run(market.open_market, table, Market())
 
 
 @router.get(
@@ -153,15 +162,345 @@ def stop_market(market_uuid: str, table=Depends(get_table), ends_in: int | None
 
 @router.get(
     "/{market_uuid}/price",
-    response_model=list[MarketPrice]
+    response_model=list[MarketPrice],
+    responses={
+        304: {
+            "description": "The prices match the ETag sent in If-None-Match.",
+        },
+    }
 )
-def read_market_prices(market_uuid: str, table=Depends(get_table)):
-    return market.read_market_prices(table, market_uuid)
+def read_market_prices(
+        market_uuid: str,
+        request: Request,
+        page: Page = Depends(get_page),
+        table=Depends(get_table),
+):
+    prices, next_cursor = market.read_market_prices(table, market_uuid, page.limit, page.cursor)
+
+    return conditional_json_response(
+        request,
+        prices,
+        list[MarketPriceRow],
+        {NEXT_CURSOR_HEADER: next_cursor} if next_cursor is not None else None,
+    )
 
 
 @router.get(
     "/{market_uuid}/balance",
-    response_model=list[MarketBalance]
+    response_model=list[MarketBalance],
+    responses={
+        304: {
+            "description": "The balances match the ETag sent in If-None-Match.",
+        },
+    }
+)
+def read_market_balances(
+        market_uuid: str,
+        request: Request,
+        page: Page = Depends(get_page),
+        table=Depends(get_table),
+):
+    balances, next_cursor = market.read_market_balances(table, market_uuid, page.limit, page.cursor)
+
+    return conditional_json_response(
+        request,
+        balances,
+        list[MarketBalanceRow],
+        {NEXT_CURSOR_HEADER: next_cursor} if next_cursor is not None else None,
+    )
+
+
+@router.get(
+    "/{market_uuid}/export",
+    dependencies=[Depends(validate_jwt)],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Every purchase, price change and card balance of the market, one row per line.",
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+        },
+        401: {
+            "description": "Failed to validate credentials.",
+            "model": APIError,
+        },
+        404: {
+            "description": "The requested market does not exist.",
+            "model": APIError,
+        },
+        413: {
+            "description": "The export is over the response size limit of the Lambda deployment.",
+            "model": APIError,
+        },
+    }
+)
+def export_market_data(
+        request: Request,
+        market_uuid: str,
+        export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+        accept_encoding: Annotated[str, Header()] = "",
+        table=Depends(get_table),
+):
+    if market.read_market(table, market_uuid) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The requested market does not exist."
+        )
+
+    compress = "gzip" in accept_encoding.lower()
+    headers = {
+        "Content-Disposition": f'attachment; filename="market-{market_uuid}.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    chunks = export_market(table, market_uuid, export_format, compress)
+
+    # Under Mangum a streamed body is buffered whole before it is returned anyway. It is built in memory and refused
+    # rather than failing the invocation once it would not fit in a Lambda response.
+    if "aws.event" in request.scope:
+        body = b"".join(chunks)
+
+        if len(body) > _LAMBDA_MAX_EXPORT_BYTES:
+            detail = "The export is too large for this deployment"
+
+            raise HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail=detail if compress else f"{detail}, request it with Accept-Encoding: gzip",
+            )
+
+        return Response(body, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+
+@router.get(
+    "/{market_uuid}/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Server-Sent Events stream of snapshot, price, event and market changes.",
+            "content": {"text/event-stream": {}},
+        },
+        404: {
+            "description": "The requested market does not exist.",
+            "model": APIError,
+        },
+        501: {
+            "description": "Streaming is not available on this deployment, poll /changes instead.",
+            "model": APIError,
+        },
+    }
+)
+async def stream_market(
+        request: Request,
+        market_uuid: str,
+        last_event_id: Annotated[int | None, Header()] = None,
+        table=Depends(get_table),
+):
+    # Under Mangum the response is only returned once the generator finishes, an endless stream would be buffered
+    # until the Lambda times out.
+    if "aws.event" in request.scope:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Streaming is not available on this deployment, poll /changes instead."
+        )
+
+    if await aio.read_market(table, market_uuid) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The requested market does not exist."
+        )
+
+    return StreamingResponse(
+        market_events(table, market_uuid, last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+_CHANGES_OVERLAP = datetime.timedelta(seconds=CHANGES_OVERLAP_SECONDS)
+
+
+def _encode_changes_cursor(since: datetime.datetime, current_event: str | None, seen: dict) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps({"since": since.isoformat(), "event": current_event, "seen": seen}).encode()
+    ).decode()
+
+
+def _decode_changes_cursor(cursor: str):
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        seen = decoded.get("seen", {"prices": {}, "balances": {}})
+
+        if not all(isinstance(seen.get(kind), dict) for kind in ("prices", "balances")):
+            raise ValueError("Invalid seen values")
+
+        # Cursors are opaque but client supplied, an offset is converted like the time range parameters are.
+        return as_local_time(datetime.datetime.fromisoformat(decoded["since"])), decoded["event"], seen
+    except (ValueError, UnicodeError, TypeError, KeyError, AttributeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid changes cursor"
+        )
+
+
+def _seen_values(prices, balances, overlap_balances) -> dict:
+    """
+    The values the client holds as of this response: every current price, as there are only a few, and the balances
+    the next read goes over again in its overlap.
+    """
+    returned_balances = {balance.card_number: balance.balance for balance in balances}
+
+    return {
+        "prices": {price.stock_code: str(price.price) for price in prices},
+        "balances": {
+            str(balance.card_number): str(returned_balances.get(balance.card_number, balance.balance))
+            for balance in overlap_balances
+        },
+    }
+
+
+@router.get(
+    "/{market_uuid}/changes",
+    response_model=MarketChanges,
+    responses={
+        400: {
+            "description": "The cursor is invalid.",
+            "model": APIError,
+        },
+        404: {
+            "description": "The requested market does not exist.",
+            "model": APIError,
+        },
+    }
+)
+async def read_market_changes(
+        market_uuid: str,
+        since: str | None = None,
+        wait: Annotated[int, Query(ge=0, le=MAX_CHANGES_WAIT_SECONDS)] = 0,
+        table=Depends(get_table),
+):
+    since_time, known_event, seen = _decode_changes_cursor(since) if since is not None else (None, None, None)
+    deadline = asyncio.get_running_loop().time() + wait
+
+    while True:
+        # Taken before the read, a change the watcher finds while it runs is not waited for.
+        generation = market_change_generation(market_uuid)
+
+        # The next cursor starts where this read started, less the overlap. The balances the next read goes over again
+        # and every price are recorded in the cursor with the value returned here, only values that moved since are
+        # returned again.
+        read_at = datetime.datetime.now()
+
+        if since_time is None:
+            current_market, (prices, _), (balances, _), overlap = await asyncio.gather(
+                aio.read_market(table, market_uuid),
+                aio.read_market_prices(table, market_uuid),
+                aio.read_market_balances(table, market_uuid),
+                aio.read_market_balances_since(table, market_uuid, read_at - _CHANGES_OVERLAP),
+            )
+            changed_prices = prices
+        else:
+            current_market, (prices, _), overlap = await asyncio.gather(
+                aio.read_market(table, market_uuid),
+                aio.read_market_prices(table, market_uuid),
+                aio.read_market_balances_since(table, market_uuid, since_time - _CHANGES_OVERLAP),
+            )
+
+            # Prices changed when they differ from the ones in the cursor, no price history is read.
+            changed_prices = [price for price in prices if seen["prices"].get(price.stock_code) != str(price.price)]
+            balances = [
+                balance for balance in overlap
+                if seen["balances"].get(str(balance.card_number)) != str(balance.balance)
+            ]
+
+        if current_market is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="The requested market does not exist."
+            )
+
+        changed = since_time is None or changed_prices or balances or current_market.current_event != known_event
+
+        if changed or asyncio.get_running_loop().time() >= deadline:
+            return MarketChanges(
+                prices=changed_prices,
+                balances=balances,
+                current_event=current_market.current_event,
+                cursor=_encode_changes_cursor(
+                    read_at, current_market.current_event, _seen_values(prices, balances, overlap)
+                ),
+            )
+
+        # The market is read again once the shared watcher sees a change, not on every tick of every waiting request.
+        # Only markets that exist get a watcher.
+        await market_change_watcher(table, market_uuid).wait(
+            generation, max(0.0, deadline - asyncio.get_running_loop().time())
+        )
+
+
+@router.get(
+    "/{market_uuid}/snapshot",
+    response_model=MarketSnapshot,
+    responses={
+        404: {
+            "description": "The requested market does not exist.",
+            "model": APIError,
+        },
+    }
 )
-def read_market_balances(market_uuid: str, table=Depends(get_table)):
-    return market.read_market_balances(table, market_uuid)
+async def read_market_snapshot(
+        market_uuid: str,
+        history_length: Annotated[int, Query(alias="history", ge=0, le=MAX_SNAPSHOT_HISTORY)] = 10,
+        table=Depends(get_table),
+):
+    current_market, (prices, _), (stocks, _) = await asyncio.gather(
+        aio.read_market(table, market_uuid),
+        aio.read_market_prices(table, market_uuid),
+        aio.read_stocks(table),
+    )
+
+    if current_market is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The requested market does not exist."
+        )
+
+    async def read_history(stock_code):
+        if history_length == 0:
+            return []
+
+        return await aio.read_latest_price_changes(table, market_uuid, stock_code, history_length)
+
+    async def read_current_event():
+        if current_market.current_event is None:
+            return None
+
+        return await aio.read_event(table, current_market.current_event)
+
+    current_event, *histories = await asyncio.gather(
+        read_current_event(),
+        *(read_history(price.stock_code) for price in prices),
+    )
+
+    stocks_by_code = {stock_model.code: stock_model for stock_model in stocks}
+
+    return MarketSnapshot(
+        market=current_market,
+        stocks=[
+            SnapshotStock(
+                stock_code=price.stock_code,
+                name=stocks_by_code[price.stock_code].name if price.stock_code in stocks_by_code else None,
+                tags=stocks_by_code[price.stock_code].tags if price.stock_code in stocks_by_code else [],
+                price=price.price,
+                history=price_changes,
+            )
+            for price, price_changes in zip(prices, histories)
+        ],
+        current_event=current_event,
+    )
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+import datetime
+from typing import Annotated
 
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException
+from starlette.requests import Request
+
+from ..constants import MAX_BATCH_PURCHASES
 from ..crud import market, purchase
-from ..dependencies import get_table, validate_jwt
-from ..schemas import PurchaseIn, PurchaseOut, APIError
+from ..dependencies import Page, TimeRange, get_page, get_table, get_time_range, validate_jwt
+from ..outbox import drain_outbox_quietly
+from ..responses import page_response
+from ..rows import PurchaseRow
+from ..schemas import Market, MarketBalance, MarketPrice, PurchaseIn, PurchaseOut, PurchaseResult, APIError
+
+_MAX_CONFLICTS = 3
 
 router = APIRouter(
     prefix="/market/{market_uuid}/purchase",
     tags=["purchases"],
-    dependencies=[Depends(get_table)],
     responses={
         400: {"description": "Bad Request"},
         404: {"description": "Not Found"},
@@ -19,16 +28,39 @@ router = APIRouter(
     "/{card_number}",
     response_model=list[PurchaseOut]
 )
-def read_purchases_for_card(market_uuid: str, card_number: int, table=Depends(get_table)):
-    return purchase.read_purchases_by_card_number(table, market_uuid, card_number)
+def read_purchases_for_card(
+        market_uuid: str,
+        card_number: int,
+        page: Page = Depends(get_page),
+        time_range: TimeRange = Depends(get_time_range),
+        table=Depends(get_table),
+):
+    purchases, next_cursor = purchase.read_purchases_by_card_number(
+        table,
+        market_uuid,
+        card_number,
+        time_range.latest or page.limit,
+        page.cursor,
+        time_range.start,
+        time_range.end,
+        newest_first=time_range.latest is not None,
+    )
+
+    return page_response(purchases, list[PurchaseRow], next_cursor)
 
 
 @router.get(
     "",
     response_model=list[PurchaseOut],
 )
-def read_purchases(market_uuid: str, table=Depends(get_table)):
-    return purchase.read_purchases(table, market_uuid)
+def read_purchases(
+        market_uuid: str,
+        page: Page = Depends(get_page),
+        table=Depends(get_table),
+):
+    purchases, next_cursor = purchase.read_purchases(table, market_uuid, page.limit, page.cursor)
+
+    return page_response(purchases, list[PurchaseRow], next_cursor)
 
 
 @router.post(
@@ -50,16 +82,162 @@ def read_purchases(market_uuid: str, table=Depends(get_table)):
         },
     },
 )
-def create_purchase(market_uuid: str, new_purchase: PurchaseIn, table=Depends(get_table)):
-    current_market = market.read_market(table, market_uuid)
+def create_purchase(
+        request: Request,
+        market_uuid: str,
+        new_purchase: PurchaseIn,
+        background_tasks: BackgroundTasks,
+        table=Depends(get_table),
+):
+    # Validated and submitted like a batch of one, so a conflict with another purchase is retried the same way.
+    result, = _submit_purchases(table, market_uuid, [new_purchase])
+
+    if result.status_code != 200:
+        raise HTTPException(status_code=result.status_code, detail=result.message)
+
+    _publish_after_response(request, background_tasks, market_uuid)
+
+    return result.purchase
+
+
+@router.post(
+    "/batch",
+    response_model=list[PurchaseResult],
+    dependencies=[Depends(validate_jwt)],
+    responses={
+        400: {
+            "description": "Market is closed.",
+            "model": APIError,
+        },
+        401: {
+            "description": "Failed to validate credentials.",
+            "model": APIError,
+        },
+        404: {
+            "description": "Market does not exist.",
+            "model": APIError,
+        },
+    },
+)
+def create_purchases(
+        request: Request,
+        market_uuid: str,
+        new_purchases: Annotated[list[PurchaseIn], Body(min_length=1, max_length=MAX_BATCH_PURCHASES)],
+        background_tasks: BackgroundTasks,
+        table=Depends(get_table),
+):
+    results = _submit_purchases(table, market_uuid, new_purchases)
+
+    if any(result.status_code == 200 for result in results):
+        _publish_after_response(request, background_tasks, market_uuid)
+
+    return results
+
+
+def _submit_purchases(table, market_uuid: str, new_purchases: list[PurchaseIn]) -> list[PurchaseResult]:
+    """
+    Validate and commit purchases, returning the result of each. Raises when the market is missing or closed before
+    anything was committed.
+    """
+    now = datetime.datetime.now()
+    results: list[PurchaseResult | None] = [None] * len(new_purchases)
+    pending = list(range(len(new_purchases)))
+    conflicts = 0
+
+    # A failed condition only rejects the purchases it applies to, the rest are validated again against fresh details
+    # and resubmitted until they are committed or rejected themselves.
+    while pending:
+        current_market, stock_prices, card_balances = market.read_purchase_details(
+            table,
+            market_uuid,
+            [new_purchases[index].stock_code for index in pending],
+            [new_purchases[index].card_number for index in pending],
+        )
 
+        try:
+            _validate_market(current_market)
+        except HTTPException as exc:
+            if len(pending) == len(new_purchases):
+                raise
+
+            for index in pending:
+                results[index] = PurchaseResult(status_code=exc.status_code, message=exc.detail)
+
+            break
+
+        accepted = {}
+
+        for index in pending:
+            new_purchase = new_purchases[index]
+
+            try:
+                purchase_out = _validate_purchase(new_purchase, stock_prices, card_balances)
+            except HTTPException as exc:
+                results[index] = PurchaseResult(status_code=exc.status_code, message=exc.detail)
+                continue
+
+            # Purchases on one card are keyed by timestamp, keep them unique within the batch.
+            purchase_out.timestamp = now + datetime.timedelta(microseconds=index)
+
+            # Later purchases on the same card are validated against the balance left by the earlier ones.
+            card_balances[new_purchase.card_number] = MarketBalance(
+                card_number=new_purchase.card_number,
+                balance=purchase_out.previous_balance - purchase_out.price,
+            )
+
+            accepted[index] = purchase_out
+
+        if not accepted:
+            break
+
+        try:
+            purchase.create_purchases(table, market_uuid, list(accepted.values()))
+        except purchase.PurchaseRejected as exc:
+            accepted_indexes = list(accepted)
+
+            for position, detail in exc.rejected.items():
+                results[accepted_indexes[position]] = PurchaseResult(status_code=400, message=detail)
+
+            if not exc.rejected:
+                conflicts += 1
+
+                if conflicts >= _MAX_CONFLICTS:
+                    for index in accepted_indexes:
+                        results[index] = PurchaseResult(status_code=400, message=exc.detail)
+
+            pending = [index for index in accepted_indexes if results[index] is None]
+
+            continue
+
+        for index, purchase_out in accepted.items():
+            results[index] = PurchaseResult(status_code=200, purchase=purchase_out)
+
+        break
+
+    return results
+
+
+def _publish_after_response(request: Request, background_tasks: BackgroundTasks, market_uuid: str):
+    # Under Mangum background tasks run before the Lambda returns its response, the table stream triggers
+    # outbox.handler there instead. Behind a regular ASGI server the events are published once the response was sent.
+    if "aws.event" not in request.scope:
+        background_tasks.add_task(drain_outbox_quietly, market_uuid)
+
+
+def _validate_market(current_market: Market | None):
     if not current_market:
         raise HTTPException(status_code=404, detail="Market does not exist")
 
     if not current_market.active:
         raise HTTPException(status_code=400, detail="Market is closed")
 
-    stock_price = market.read_market_price(table, market_uuid, new_purchase.stock_code)
+
+def _validate_purchase(
+        new_purchase: PurchaseIn,
+        stock_prices: dict[str, MarketPrice],
+        card_balances: dict[int, MarketBalance],
+) -> PurchaseOut:
+    stock_price = stock_prices.get(new_purchase.stock_code)
 
     if not stock_price:
         raise HTTPException(status_code=404, detail="Stock does not exist")
@@ -67,19 +245,15 @@ def create_purchase(market_uuid: str, new_purchase: PurchaseIn, table=Depends(ge
     if stock_price.price != new_purchase.price:
         raise HTTPException(status_code=400, detail="Stock price has changed, please refresh and submit again")
 
-    card_balance = market.read_market_balance(table, market_uuid, new_purchase.card_number)
+    card_balance = card_balances.get(new_purchase.card_number)
 
     if card_balance is None:
         raise HTTPException(status_code=404, detail="Card does not exist")
 
-    purchase_out = PurchaseOut(
+    if card_balance.balance < new_purchase.price:
+        raise HTTPException(status_code=400, detail="Insufficient card balance")
+
+    return PurchaseOut(
         **new_purchase.model_dump(),
         previous_balance=card_balance.balance
     )
-
-    new_balance = card_balance.balance - new_purchase.price
-
-    if new_balance < 0:
-        raise HTTPException(status_code=400, detail="Insufficient card balance")
-
-    return purchase.create_purchase(table, market_uuid, purchase_out, new_balance)
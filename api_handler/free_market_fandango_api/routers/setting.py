@@ -9,7 +9,6 @@ from ..utils import notify_cache_invalid_event
 router = APIRouter(
     prefix="/settings",
     tags=["settings"],
-    dependencies=[Depends(get_table)],
 )
 
 
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException
-from spotipy import CacheHandler, Spotify, SpotifyOAuth
 from starlette.responses import Response
 
 from ..crud import spotify
@@ -10,47 +9,14 @@ from ..schemas import SpotifyConnectRequest, SpotifyAccountResponse, APIError, S
 router = APIRouter(
     prefix="/spotify",
     tags=["spotify"],
-    dependencies=[Depends(get_table)],
 )
 
 
-class SettingsCacheHandler(CacheHandler):
-    def __init__(self, table):
-        self.table = table
+def get_spotify_handler(table=Depends(get_table)):
+    # spotipy is only imported once a Spotify route is called, keeping it out of the cold start of every other route.
+    from ..spotify_handler import SpotifyHandler
 
-    def get_cached_token(self):
-        return spotify.read_spotify_token(self.table)
-
-    def save_token_to_cache(self, token_info):
-        spotify.update_spotify_token(self.table, token_info)
-
-
-class SpotifyHandler:
-    def __init__(self, table):
-        self._table = table
-        self._spotify_cache = SettingsCacheHandler(self._table)
-        self._spotify_oauth = SpotifyOAuth(
-            scope="user-read-currently-playing", cache_handler=self._spotify_cache
-        )
-        self._spotify = Spotify(auth_manager=self._spotify_oauth)
-
-    def get_auth_url(self):
-        return self._spotify_oauth.get_authorize_url()
-
-    def save_auth_token(self, code):
-        self._spotify_oauth.get_access_token(code)
-
-    def is_logged_in(self):
-        return True if self._spotify_oauth.get_cached_token() else False
-
-    def get_account_info(self):
-        return self._spotify.current_user()
-
-    def currently_playing(self):
-        if self.is_logged_in() and self._spotify.currently_playing():
-            return self._spotify.currently_playing()
-        else:
-            return False
+    return SpotifyHandler(table=table)
 
 
 @router.get(
@@ -63,9 +29,7 @@ class SpotifyHandler:
         }
     },
 )
-async def spotify_account_info(table=Depends(get_table)):
-    spotify_handler = SpotifyHandler(table=table)
-
+async def spotify_account_info(spotify_handler=Depends(get_spotify_handler)):
     if not spotify_handler.is_logged_in():
         raise HTTPException(status_code=400, detail="No account connected, connect an account first")
 
@@ -85,9 +49,7 @@ async def spotify_account_info(table=Depends(get_table)):
     response_model=SpotifyRedirectResponse,
     dependencies=[Depends(validate_jwt)],
 )
-async def spotify_redirect_for_authz(table=Depends(get_table)):
-    spotify_handler = SpotifyHandler(table=table)
-
+async def spotify_redirect_for_authz(spotify_handler=Depends(get_spotify_handler)):
     return SpotifyRedirectResponse(
         redirect_url=spotify_handler.get_auth_url()
     )
@@ -98,8 +60,7 @@ async def spotify_redirect_for_authz(table=Depends(get_table)):
     dependencies=[Depends(validate_jwt)],
     status_code=204
 )
-async def save_auth_token(request: SpotifyConnectRequest, table=Depends(get_table)):
-    spotify_handler = SpotifyHandler(table=table)
+async def save_auth_token(request: SpotifyConnectRequest, spotify_handler=Depends(get_spotify_handler)):
     spotify_handler.save_auth_token(request.auth_code)
 
     return Response(status_code=204)
@@ -126,9 +87,7 @@ async def delete_auth_token(table=Depends(get_table)):
         }
     },
 )
-async def get_spotify_currently_playing(table=Depends(get_table)):
-    spotify_handler = SpotifyHandler(table=table)
-
+async def get_spotify_currently_playing(spotify_handler=Depends(get_spotify_handler)):
     if not spotify_handler.is_logged_in():
         raise HTTPException(status_code=400, detail="No account connected, connect an account first")
 
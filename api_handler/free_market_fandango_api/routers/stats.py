@@ -0,0 +1,32 @@
+import asyncio
+
+from fastapi import APIRouter, Depends
+
+from ..crud import aio
+from ..dependencies import get_table
+from ..schemas import CatalogStats
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+)
+
+
+@router.get(
+    "",
+    response_model=CatalogStats,
+)
+async def read_stats(table=Depends(get_table)):
+    cards, stocks, events, active_market = await asyncio.gather(
+        aio.count_cards(table),
+        aio.count_stocks(table),
+        aio.count_events(table),
+        aio.read_active_market(table),
+    )
+
+    return CatalogStats(
+        cards=cards,
+        stocks=stocks,
+        events=events,
+        active_market=active_market.uuid if active_market is not None else None,
+    )
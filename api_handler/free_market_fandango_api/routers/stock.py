@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends
 from starlette import status
 from starlette.exceptions import HTTPException
 
+from ..constants import MAX_BULK_IMPORT
 from ..crud import stock
-from ..dependencies import get_table, validate_jwt
+from ..dependencies import Page, get_page, get_table, validate_jwt
+from ..responses import page_response
 from ..schemas import Stock, APIError
 
 router = APIRouter(
     prefix="/stock",
     tags=["stocks"],
-    dependencies=[Depends(get_table)],
-
 )
 
 
@@ -18,8 +20,10 @@ router = APIRouter(
     "",
     response_model=list[Stock],
 )
-def read_stocks(table=Depends(get_table)):
-    return stock.read_stocks(table)
+def read_stocks(page: Page = Depends(get_page), table=Depends(get_table)):
+    stocks, next_cursor = stock.read_stocks(table, page.limit, page.cursor)
+
+    return page_response(stocks, list[Stock], next_cursor)
 
 
 @router.put(
@@ -37,6 +41,31 @@ def create_stock(stock_model: Stock, table=Depends(get_table)):
     return stock.create_stock(table, stock_model)
 
 
+@router.put(
+    "/batch",
+    dependencies=[Depends(validate_jwt)],
+    response_model=list[Stock],
+    responses={
+        400: {
+            "description": "The same stock code appears more than once.",
+            "model": APIError,
+        },
+        401: {
+            "description": "Failed to validate credentials.",
+            "model": APIError,
+        },
+    },
+)
+def create_stocks(
+        stock_models: Annotated[list[Stock], Body(min_length=1, max_length=MAX_BULK_IMPORT)],
+        table=Depends(get_table),
+):
+    if len({stock_model.code for stock_model in stock_models}) != len(stock_models):
+        raise HTTPException(status_code=400, detail="Stock codes must be unique")
+
+    return stock.create_stocks(table, stock_models)
+
+
 @router.get(
     "/{stock_code}",
     response_model=Stock,
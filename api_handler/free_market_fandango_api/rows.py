@@ -0,0 +1,71 @@
+import datetime
+import decimal
+from dataclasses import dataclass
+
+from .utils import key_splitter
+
+# Lightweight rows for bulk list results read back from items this API wrote itself. They skip model validation, are
+# serialized by the same pydantic serializer (same JSON as their schema counterparts) and are accepted wherever those
+# schemas are expected.
+
+_split_pair = key_splitter(2)
+_split_triple = key_splitter(3)
+
+
+@dataclass(slots=True)
+class PurchaseRow:
+    price: decimal.Decimal
+    stock_code: str
+    card_number: int
+    previous_balance: decimal.Decimal
+    timestamp: datetime.datetime
+
+    @classmethod
+    def from_item(cls, item):
+        _, card_number, timestamp = _split_triple(item["SK"])
+
+        return cls(
+            item["Price"],
+            item["StockCode"],
+            int(card_number),
+            item["PreviousBalance"],
+            datetime.datetime.fromisoformat(timestamp),
+        )
+
+
+@dataclass(slots=True)
+class PriceChangeRow:
+    stock_code: str
+    previous_price: decimal.Decimal
+    reason: str
+    timestamp: datetime.datetime
+
+    @classmethod
+    def from_item(cls, item):
+        _, stock_code, timestamp = _split_triple(item["SK"])
+
+        return cls(stock_code, item["PreviousPrice"], item["Reason"], datetime.datetime.fromisoformat(timestamp))
+
+
+@dataclass(slots=True)
+class MarketBalanceRow:
+    card_number: int
+    balance: decimal.Decimal
+
+    @classmethod
+    def from_item(cls, item):
+        _, card_number = _split_pair(item["SK"])
+
+        return cls(int(card_number), item["Balance"])
+
+
+@dataclass(slots=True)
+class MarketPriceRow:
+    stock_code: str
+    price: decimal.Decimal
+
+    @classmethod
+    def from_item(cls, item):
+        _, stock_code = _split_pair(item["SK"])
+
+        return cls(stock_code, item["Price"])
@@ -3,7 +3,7 @@ import decimal
 from typing import Optional
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, constr, Field, computed_field, model_validator
+from pydantic import BaseModel, ConfigDict, constr, Field, computed_field, model_validator
 from .constants import Settings
 
 
@@ -63,22 +63,45 @@ class Market(BaseModel):
 
 
 class MarketBalance(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     card_number: int
     balance: decimal.Decimal
 
 
 class MarketPrice(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     stock_code: str
     price: decimal.Decimal
 
 
+class MarketChanges(BaseModel):
+    prices: list[MarketPrice]
+    balances: list[MarketBalance]
+    current_event: str | None = None
+    cursor: str
+
+
 class PriceChange(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     stock_code: str
     previous_price: decimal.Decimal
     reason: str
     timestamp: datetime.datetime
 
 
+class Candle(BaseModel):
+    stock_code: str
+    start: datetime.datetime
+    open: decimal.Decimal
+    high: decimal.Decimal
+    low: decimal.Decimal
+    close: decimal.Decimal
+    changes: int
+
+
 class PurchaseIn(BaseModel):
     price: decimal.Decimal
     stock_code: str
@@ -86,10 +109,51 @@ class PurchaseIn(BaseModel):
 
 
 class PurchaseOut(PurchaseIn):
+    model_config = ConfigDict(from_attributes=True)
+
     previous_balance: decimal.Decimal = 0
     timestamp: datetime.datetime = Field(default_factory=datetime.datetime.now)
 
 
+class StockAggregate(BaseModel):
+    stock_code: str
+    count: int
+    revenue: decimal.Decimal
+
+
+class CardAggregate(BaseModel):
+    card_number: int
+    count: int
+    spend: decimal.Decimal
+
+
+class PurchaseResult(BaseModel):
+    status_code: int
+    purchase: PurchaseOut | None = None
+    message: str | None = None
+
+
+class SnapshotStock(BaseModel):
+    stock_code: str
+    name: str | None = None
+    tags: list[str] = []
+    price: decimal.Decimal
+    history: list[PriceChange] = []
+
+
+class MarketSnapshot(BaseModel):
+    market: Market
+    stocks: list[SnapshotStock]
+    current_event: EventOut | None = None
+
+
+class CatalogStats(BaseModel):
+    cards: int
+    stocks: int
+    events: int
+    active_market: UUID | None = None
+
+
 class Setting(BaseModel):
     key: Settings
     value: int
@@ -0,0 +1,42 @@
+from spotipy import CacheHandler, Spotify, SpotifyOAuth
+
+from .crud import spotify
+
+
+class SettingsCacheHandler(CacheHandler):
+    def __init__(self, table):
+        self.table = table
+
+    def get_cached_token(self):
+        return spotify.read_spotify_token(self.table)
+
+    def save_token_to_cache(self, token_info):
+        spotify.update_spotify_token(self.table, token_info)
+
+
+class SpotifyHandler:
+    def __init__(self, table):
+        self._table = table
+        self._spotify_cache = SettingsCacheHandler(self._table)
+        self._spotify_oauth = SpotifyOAuth(
+            scope="user-read-currently-playing", cache_handler=self._spotify_cache
+        )
+        self._spotify = Spotify(auth_manager=self._spotify_oauth)
+
+    def get_auth_url(self):
+        return self._spotify_oauth.get_authorize_url()
+
+    def save_auth_token(self, code):
+        self._spotify_oauth.get_access_token(code)
+
+    def is_logged_in(self):
+        return True if self._spotify_oauth.get_cached_token() else False
+
+    def get_account_info(self):
+        return self._spotify.current_user()
+
+    def currently_playing(self):
+        if self.is_logged_in() and self._spotify.currently_playing():
+            return self._spotify.currently_playing()
+        else:
+            return False
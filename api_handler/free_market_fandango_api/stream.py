@@ -0,0 +1,263 @@
+import asyncio
+import datetime
+import os
+from collections import deque
+
+from pydantic_core import to_json
+
+from .constants import CHANGES_OVERLAP_SECONDS
+from .crud import aio
+
+_POLL_SECONDS = float(os.environ.get("STREAM_POLL_SECONDS", "2"))
+_HEARTBEAT_SECONDS = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", "15"))
+_REPLAY_SIZE = 256
+_SUBSCRIBER_BUFFER = 64
+
+
+def _format_event(event_id: int, name: str, data) -> str:
+    return f"id: {event_id}\nevent: {name}\ndata: {to_json(data).decode()}\n\n"
+
+
+class MarketBroadcaster:
+    """
+    Polls one market for price, event and open/close changes and fans them out to every connected client, so any
+    number of screens cost a single backend poll.
+    """
+
+    def __init__(self, table, market_uuid: str):
+        self._table = table
+        self._market_uuid = market_uuid
+        self._subscribers = set()
+        self._replay = deque(maxlen=_REPLAY_SIZE)
+        self._last_event_id = 0
+        self._state = None
+        self._ready = asyncio.Event()
+        self._task = None
+
+    async def _read_state(self):
+        current_market, (prices, _) = await asyncio.gather(
+            aio.read_market(self._table, self._market_uuid),
+            aio.read_market_prices(self._table, self._market_uuid),
+        )
+
+        return {
+            "prices": {price.stock_code: price.price for price in prices},
+            "current_event": current_market.current_event if current_market else None,
+            "active": current_market.active if current_market else False,
+            "closed_at": current_market.closed_at if current_market else None,
+        }
+
+    def _publish(self, name: str, data):
+        self._last_event_id += 1
+        message = _format_event(self._last_event_id, name, data)
+        self._replay.append((self._last_event_id, message))
+
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # The client is not keeping up, drop it so it reconnects and resumes from its Last-Event-ID.
+                self._subscribers.discard(queue)
+
+    def _publish_changes(self, previous, current):
+        changed_prices = [
+            {"stock_code": stock_code, "price": price}
+            for stock_code, price in current["prices"].items()
+            if previous["prices"].get(stock_code) != price
+        ]
+
+        if changed_prices:
+            self._publish("price", changed_prices)
+
+        if current["current_event"] != previous["current_event"]:
+            self._publish("event", {"current_event": current["current_event"]})
+
+        if current["active"] != previous["active"] or current["closed_at"] != previous["closed_at"]:
+            self._publish("market", {"active": current["active"], "closed_at": current["closed_at"]})
+
+    async def _poll(self):
+        while self._subscribers:
+            try:
+                state = await self._read_state()
+            except Exception:
+                # A failed poll is retried on the next tick, the connected clients keep their streams.
+                state = None
+
+            if state is not None:
+                if self._state is not None:
+                    self._publish_changes(self._state, state)
+
+                self._state = state
+                self._ready.set()
+
+            await asyncio.sleep(_POLL_SECONDS)
+
+        # The next subscriber waits for a fresh poll instead of a snapshot of a possibly long stale state.
+        self._ready.clear()
+        self._task = None
+
+    def _snapshot(self) -> str:
+        return _format_event(
+            self._last_event_id,
+            "snapshot",
+            {
+                "prices": [
+                    {"stock_code": stock_code, "price": price} for stock_code, price in self._state["prices"].items()
+                ],
+                "current_event": self._state["current_event"],
+                "active": self._state["active"],
+                "closed_at": self._state["closed_at"],
+            },
+        )
+
+    async def subscribe(self, last_event_id: int | None = None):
+        queue = asyncio.Queue(maxsize=_SUBSCRIBER_BUFFER)
+        self._subscribers.add(queue)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+        try:
+            await self._ready.wait()
+
+            # Anything queued so far is covered by the replay or the snapshot, which are computed without yielding to
+            # the poll loop in between.
+            while not queue.empty():
+                queue.get_nowait()
+
+            oldest_event_id = self._replay[0][0] if self._replay else self._last_event_id + 1
+
+            if last_event_id is not None and oldest_event_id - 1 <= last_event_id <= self._last_event_id:
+                initial = [message for event_id, message in self._replay if event_id > last_event_id]
+            else:
+                initial = [self._snapshot()]
+
+            for message in initial:
+                yield message
+
+            while queue in self._subscribers:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            self._subscribers.discard(queue)
+
+
+_broadcasters = {}
+
+
+def market_events(table, market_uuid: str, last_event_id: int | None = None):
+    broadcaster = _broadcasters.get(market_uuid)
+
+    if broadcaster is None:
+        broadcaster = _broadcasters[market_uuid] = MarketBroadcaster(table, market_uuid)
+
+    return broadcaster.subscribe(last_event_id)
+
+
+class MarketChangeWatcher:
+    """
+    Checks one market for price, balance and event changes on behalf of every long-polling /changes request, which
+    only read their own changes again once a check found something, so any number of waiting clients cost a single
+    check per poll.
+    """
+
+    def __init__(self, table, market_uuid: str):
+        self._table = table
+        self._market_uuid = market_uuid
+        self._waiters = 0
+        self._changed = asyncio.Event()
+        self._task = None
+        self.generation = 0
+
+    async def _check(self, since: datetime.datetime):
+        # Three queries whatever the number of stocks: prices are compared with the previous check, not looked up in
+        # the price history.
+        current_market, (prices, _), balances = await asyncio.gather(
+            aio.read_market(self._table, self._market_uuid),
+            aio.read_market_prices(self._table, self._market_uuid),
+            aio.read_market_balances_since(
+                self._table, self._market_uuid, since - datetime.timedelta(seconds=CHANGES_OVERLAP_SECONDS)
+            ),
+        )
+
+        return {
+            "prices": {price.stock_code: price.price for price in prices},
+            "balances": {balance.card_number: balance.balance for balance in balances},
+            "current_event": current_market.current_event if current_market else None,
+        }
+
+    @staticmethod
+    def _has_changes(previous, current) -> bool:
+        # The checks overlap like the cursors do, what the previous check already found is not reported twice.
+        return (
+            current["current_event"] != previous["current_event"]
+            or any(previous["prices"].get(code) != price for code, price in current["prices"].items())
+            or any(previous["balances"].get(number) != balance for number, balance in current["balances"].items())
+        )
+
+    async def _poll(self):
+        checked_at = datetime.datetime.now()
+        state = None
+
+        while True:
+            await asyncio.sleep(_POLL_SECONDS)
+
+            if not self._waiters:
+                break
+
+            read_at = datetime.datetime.now()
+
+            try:
+                current = await self._check(checked_at)
+            except Exception:
+                # A failed check is retried on the next tick, the waiting requests time out at worst.
+                continue
+
+            # A fresh watcher does not know what its waiters have seen, its first check wakes them to look themselves.
+            if state is None or self._has_changes(state, current):
+                self.generation += 1
+                self._changed.set()
+                self._changed = asyncio.Event()
+
+            state, checked_at = current, read_at
+
+        self._task = None
+
+    async def wait(self, generation: int, timeout: float):
+        """Wait until a check after `generation` finds a change, or for at most `timeout` seconds."""
+        if generation != self.generation:
+            return
+
+        changed = self._changed
+        self._waiters += 1
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiters -= 1
+
+
+_watchers = {}
+
+
+def market_change_generation(market_uuid: str) -> int:
+    """The generation a wait on the market should start from, taken before the market is read."""
+    watcher = _watchers.get(market_uuid)
+
+    return watcher.generation if watcher is not None else 0
+
+
+def market_change_watcher(table, market_uuid: str) -> MarketChangeWatcher:
+    watcher = _watchers.get(market_uuid)
+
+    if watcher is None:
+        watcher = _watchers[market_uuid] = MarketChangeWatcher(table, market_uuid)
+
+    return watcher
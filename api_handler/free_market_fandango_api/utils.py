@@ -1,13 +1,24 @@
+import base64
+import json
+import operator
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from uuid import uuid4
 
-import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from .aws import get_sqs_client
 
 
 _JOIN_SYMBOL = '#'
+# Sorts after every ISO timestamp, used as the open upper bound of a time range on sort keys.
+_END_OF_TIME = '~'
 
-_sqs = boto3.client('sqs')
 _queue_url = os.environ["SQS_QUEUE_URL"]
+_SQS_BATCH_SIZE = 10
 
 
 def build_key(*args):
@@ -20,56 +31,245 @@ def explode_key(key: str):
     return key.split(_JOIN_SYMBOL)
 
 
-def find_setting_value(current_settings, search_key):
-    return next((setting for setting in current_settings if setting.key == search_key), None).value
+def key_splitter(components: int):
+    """
+    Build a splitter for keys of exactly `components` components, splitting at most that many times so a trailing
+    timestamp or other free-form component is never split further.
+    """
+    return operator.methodcaller("split", _JOIN_SYMBOL, components - 1)
+
+
+def time_range_condition(partition_key: str, *sort_key_prefix, start=None, end=None):
+    """Key condition for the items of a partition whose sort key is `sort_key_prefix` followed by a timestamp."""
+    return Key("PK").eq(partition_key) & Key("SK").between(
+        build_key(*sort_key_prefix, start.isoformat() if start is not None else ""),
+        build_key(*sort_key_prefix, end.isoformat() if end is not None else _END_OF_TIME),
+    )
+
+
+def encode_cursor(last_evaluated_key: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode()).decode()
+
+
+class InvalidCursor(ValueError):
+    def __init__(self):
+        super().__init__("Invalid pagination cursor")
+
+
+def decode_cursor(cursor: str, partition_key: str | None = None) -> dict:
+    """Decode a pagination cursor, it must be a string PK/SK key within `partition_key` when that is given."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeError):
+        raise InvalidCursor()
+
+    if not isinstance(key, dict) or set(key) != {"PK", "SK"}:
+        raise InvalidCursor()
+
+    if not all(isinstance(value, str) for value in key.values()):
+        raise InvalidCursor()
+
+    if partition_key is not None and key["PK"] != partition_key:
+        raise InvalidCursor()
+
+    return key
+
+
+def iterate_query(table, **kwargs):
+    """Yield every item matched by a query, following LastEvaluatedKey across pages."""
+    while True:
+        response = table.query(**kwargs)
+
+        yield from response["Items"]
+
+        if "LastEvaluatedKey" not in response:
+            return
+
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def query_exists(table, **kwargs) -> bool:
+    """Whether a query matches at least one item, reading a single item's worth of capacity."""
+    return table.query(Select="COUNT", Limit=1, **kwargs)["Count"] > 0
+
+
+def query_count(table, **kwargs) -> int:
+    """Count the items matched by a query without returning them, following LastEvaluatedKey across pages."""
+    count = 0
+
+    while True:
+        response = table.query(Select="COUNT", **kwargs)
+        count += response["Count"]
+
+        if "LastEvaluatedKey" not in response:
+            return count
+
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def query_page(
+        table,
+        limit: int | None = None,
+        cursor: str | None = None,
+        partition_key: str | None = None,
+        **kwargs,
+):
+    """
+    Read up to `limit` items of a query on `partition_key` starting after `cursor`, returns the items and the cursor of
+    the next page.
+
+    Without a limit every remaining page is read and the returned cursor is None.
+    """
+    if cursor is not None:
+        kwargs["ExclusiveStartKey"] = decode_cursor(cursor, partition_key)
+
+    items = []
+
+    while True:
+        if limit is not None:
+            kwargs["Limit"] = limit - len(items)
+
+        try:
+            response = table.query(**kwargs)
+        except ClientError as exc:
+            # A cursor from another query of the same partition falls outside this query's key condition.
+            if cursor is not None and not items and exc.response["Error"]["Code"] == "ValidationException":
+                raise InvalidCursor()
+
+            raise
+
+        items.extend(response["Items"])
 
+        if "LastEvaluatedKey" not in response:
+            return items, None
 
-def _send_sqs_message(message_body, message_attributes=None):
-    return _sqs.send_message(
+        if limit is not None and len(items) >= limit:
+            return items, encode_cursor(response["LastEvaluatedKey"])
+
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def sqs_message(message_body, message_attributes=None, deduplication_id: str | None = None):
+    return {
+        "MessageAttributes": {} if message_attributes is None else message_attributes,
+        "MessageBody": message_body,
+        "MessageGroupId": 'FreeMarketFandango',
+        "MessageDeduplicationId": str(uuid4()) if deduplication_id is None else deduplication_id,
+    }
+
+
+def sqs_batches(messages: list):
+    """Split messages into the largest batches a single SendMessageBatch call accepts."""
+    for start in range(0, len(messages), _SQS_BATCH_SIZE):
+        yield messages[start:start + _SQS_BATCH_SIZE]
+
+
+def send_sqs_batch(messages: list[dict]) -> list[int]:
+    """Send one batch of messages, returns the sorted indexes of the messages SQS did not accept."""
+    response = get_sqs_client().send_message_batch(
         QueueUrl=_queue_url,
-        MessageAttributes={} if message_attributes is None else message_attributes,
-        MessageBody=message_body,
-        MessageGroupId='FreeMarketFandango',
-        MessageDeduplicationId=str(uuid4())
+        Entries=[{"Id": str(index), **message} for index, message in enumerate(messages)],
     )
 
+    return sorted(int(failure["Id"]) for failure in response.get("Failed", []))
+
+
+def send_sqs_messages(messages: list[dict]):
+    for batch in sqs_batches(messages):
+        for _ in range(2):
+            failed = send_sqs_batch(batch)
+
+            if not failed:
+                break
+
+            batch = [batch[index] for index in failed]
+        else:
+            raise RuntimeError(f"Failed to send {len(batch)} SQS message(s)")
+
+
+class NotificationDispatcher:
+    """Buffers the SQS messages of one request or invocation so they can be sent with as few calls as possible."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._messages = []
+        self._invalidated_markets = set()
+
+    def add_cache_invalid(self, market_uuid: str, message_attributes):
+        with self._lock:
+            if market_uuid in self._invalidated_markets:
+                return
+
+            self._invalidated_markets.add(market_uuid)
+            self._messages.append(sqs_message('CacheInvalid', message_attributes))
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._messages)
 
-def notify_purchase_event(market_uuid: str, stock_code: str):
-    _send_sqs_message(
-        'Purchase',
-        {
-            'MarketUUID': {
-                'DataType': 'String',
-                'StringValue': market_uuid
-            },
-            'StockCode': {
-                'DataType': 'String',
-                'StringValue': stock_code
-            }
+    def flush(self):
+        with self._lock:
+            messages, self._messages = self._messages, []
+            self._invalidated_markets.clear()
+
+        send_sqs_messages(messages)
+
+
+_dispatcher: ContextVar[NotificationDispatcher | None] = ContextVar("notification_dispatcher", default=None)
+
+
+@contextmanager
+def buffered_notifications():
+    """Buffer the notifications sent within the block, the caller is responsible for flushing the dispatcher."""
+    dispatcher = NotificationDispatcher()
+    token = _dispatcher.set(dispatcher)
+
+    try:
+        yield dispatcher
+    finally:
+        _dispatcher.reset(token)
+
+
+def purchase_event(market_uuid: str, stock_code: str):
+    return 'Purchase', {
+        'MarketUUID': {
+            'DataType': 'String',
+            'StringValue': market_uuid
+        },
+        'StockCode': {
+            'DataType': 'String',
+            'StringValue': stock_code
         }
-    )
+    }
+
+
+def _read_active_market_uuid(table):
+    # Shares the active market cache of crud.market, imported here as crud.market itself depends on this module.
+    from .crud.market import read_active_market
+
+    active_market = read_active_market(table)
+
+    return str(active_market.uuid) if active_market is not None else None
 
 
 def notify_cache_invalid_event(table, market_uuid: str = None):
     if market_uuid is None:
-        active_market = table.get_item(
-            Key={
-                'PK': 'Market',
-                'SK': 'Active'
-            }
-        )
-
-        if "Item" not in active_market:
+        market_uuid = _read_active_market_uuid(table)
+
+        if market_uuid is None:
             return
 
-        market_uuid = active_market["Item"]["UUID"]
+    message_attributes = {
+        'MarketUUID': {
+            'DataType': 'String',
+            'StringValue': market_uuid
+        },
+    }
 
-    _send_sqs_message(
-        'CacheInvalid',
-        {
-            'MarketUUID': {
-                'DataType': 'String',
-                'StringValue': market_uuid
-            },
-        }
-    )
+    dispatcher = _dispatcher.get()
+
+    if dispatcher is not None:
+        dispatcher.add_cache_invalid(market_uuid, message_attributes)
+    else:
+        send_sqs_messages([sqs_message('CacheInvalid', message_attributes)])
@@ -0,0 +1,84 @@
+import importlib
+import logging
+import os
+import time
+
+from .aws import get_dynamodb_table, get_sqs_client
+from .crud import market
+
+logger = logging.getLogger(__name__)
+
+
+def is_warmup_event(event) -> bool:
+    """A keep-warm ping, either invoked with {"warmup": true} or an EventBridge schedule targeting the function."""
+    if not isinstance(event, dict):
+        return False
+
+    return event.get("warmup") is True or (
+        event.get("source") == "aws.events" and event.get("detail-type") == "Scheduled Event"
+    )
+
+
+def _prime_sqs():
+    # Creating the client opens no connection, a cheap call leaves one in the pool for the cache notifications.
+    get_sqs_client().get_queue_attributes(QueueUrl=os.environ["SQS_QUEUE_URL"], AttributeNames=["QueueArn"])
+
+
+def _prime_purchase_reads(table):
+    # The BatchGetItem a purchase validates with, leaving a connection in the DynamoDB pool. Nothing is cached for
+    # the next request: the caches expire within seconds, long before the next ping.
+    active_market = market.read_active_market(table)
+
+    if active_market is not None:
+        market.read_purchase_details(table, str(active_market.uuid), [], [])
+
+
+def _prime_jose():
+    # Imported on the first authenticated request otherwise, every purchase is one.
+    importlib.import_module("jose.jwt")
+
+
+def warm_up() -> dict:
+    """
+    Open the connection pools and load the modules the first purchase needs, reporting each step. Connections and
+    modules outlive the invocation, which is what keeps the next real request fast.
+    """
+    started_at = time.monotonic()
+    table = get_dynamodb_table()
+
+    steps = {
+        "dynamodb": lambda: _prime_purchase_reads(table),
+        "sqs": _prime_sqs,
+        "jose": _prime_jose,
+    }
+
+    primed = []
+    failed = {}
+
+    for name, prime in steps.items():
+        try:
+            prime()
+        except Exception as exc:
+            # A failed step is left to the first request, as without a warm-up.
+            logger.warning("Warm-up step %s failed", name, exc_info=True)
+            failed[name] = str(exc)
+        else:
+            primed.append(name)
+
+    return {
+        "warmup": True,
+        "primed": primed,
+        "failed": failed,
+        "duration_ms": round((time.monotonic() - started_at) * 1000),
+    }
+
+
+def with_warmup(asgi_handler):
+    """Wrap a Lambda handler so warm-up events are answered directly instead of going through the ASGI app."""
+    def handler(event, context):
+        if is_warmup_event(event):
+            return warm_up()
+
+        return asgi_handler(event, context)
+
+    return handler
@@ -0,0 +1,133 @@
+import os
+import sys
+from pathlib import Path
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ["DYNAMODB_TABLE_ARN"] = "free-market-fandango"
+os.environ["SECRET_KEY"] = "secret"
+os.environ["ADMIN_PASSWORD"] = "password"
+
+
+@pytest.fixture
+def aws():
+    with mock_aws():
+        sqs = boto3.client("sqs")
+        queue_url = sqs.create_queue(
+            QueueName="free-market-fandango.fifo",
+            Attributes={"FifoQueue": "true"},
+        )["QueueUrl"]
+        os.environ["SQS_QUEUE_URL"] = queue_url
+
+        table = boto3.resource("dynamodb").create_table(
+            TableName=os.environ["DYNAMODB_TABLE_ARN"],
+            KeySchema=[
+                {"AttributeName": "PK", "KeyType": "HASH"},
+                {"AttributeName": "SK", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        # The package keeps clients and caches at module level, every test starts from a fresh import.
+        for module in [module for module in sys.modules if module.startswith("free_market_fandango_api")]:
+            del sys.modules[module]
+
+        yield table, sqs, queue_url
+
+
+@pytest.fixture
+def client(aws):
+    from fastapi.testclient import TestClient
+
+    from free_market_fandango_api.main import app
+
+    test_client = TestClient(app)
+    token = test_client.post("/auth", json={"password": "password"}).json()["access_token"]
+    test_client.headers["Authorization"] = f"Bearer {token}"
+
+    return test_client
+
+
+@pytest.fixture
+def open_market(client, aws):
+    """Open a market with one card and one stock, writing the items the market engine would normally create."""
+    table, _, _ = aws
+
+    def open_market(cards=((1, 10),), stocks=(("BEER", 3),)):
+        for card_number, balance in cards:
+            client.put("/card", json={"card_number": card_number, "name": "Card", "balance": balance})
+
+        for code, price in stocks:
+            client.put("/stock", json={"code": code, "name": code.title(), "initial_price": price})
+
+        client.put("/event", json={"title": "News", "body": "", "breaking": False, "change_min": 1, "change_max": 2})
+
+        response = client.post("/market")
+        assert response.status_code == 200, response.text
+        market = response.json()
+
+        table.put_item(
+            Item={
+                "PK": "Market",
+                "SK": "Active",
+                "UUID": market["uuid"],
+                "OpenedAt": market["opened_at"],
+                "ClosedAt": None,
+                "CurrentEvent": None,
+            }
+        )
+
+        for card_number, balance in cards:
+            table.put_item(Item={"PK": f"Market#{market['uuid']}", "SK": f"Card#{card_number}", "Balance": balance})
+
+        for code, price in stocks:
+            table.put_item(Item={"PK": f"Market#{market['uuid']}", "SK": f"Stock#{code}", "Price": price})
+
+        return market["uuid"]
+
+    return open_market
+
+
+@pytest.fixture
+def lambda_request(client):
+    """Send a request through the Mangum handler the function is deployed with, as an HTTP API (v2) event."""
+    import json
+
+    from free_market_fandango_api.main import handler
+
+    def lambda_request(method, path, body=None, query="", headers=None):
+        response = handler(
+            {
+                "version": "2.0",
+                "routeKey": "$default",
+                "rawPath": path,
+                "rawQueryString": query,
+                "headers": {
+                    "host": "example.com",
+                    "content-type": "application/json",
+                    "authorization": client.headers["Authorization"],
+                    **(headers or {}),
+                },
+                "requestContext": {
+                    "http": {"method": method, "path": path, "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1"},
+                },
+                "body": json.dumps(body) if body is not None else None,
+                "isBase64Encoded": False,
+            },
+            None,
+        )
+
+        return response
+
+    return lambda_request
@@ -0,0 +1,79 @@
+import datetime
+import decimal
+
+import pytest
+
+
+def _buy(client, market_uuid, *purchases):
+    response = client.post(
+        f"/market/{market_uuid}/purchase/batch",
+        json=[{"price": price, "stock_code": code, "card_number": card} for card, code, price in purchases],
+    )
+
+    assert [result["status_code"] for result in response.json()] == [200] * len(purchases), response.text
+
+
+def test_single_and_batch_purchases_add_up(client, open_market):
+    market_uuid = open_market(cards=((1, 50), (2, 50)), stocks=(("BEER", 3), ("WINE", 7)))
+
+    response = client.post(f"/market/{market_uuid}/purchase", json={"price": 3, "stock_code": "BEER", "card_number": 1})
+    assert response.status_code == 200
+
+    _buy(client, market_uuid, (1, "BEER", 3), (2, "WINE", 7), (2, "WINE", 7), (2, "BEER", 3))
+
+    assert client.get(f"/market/{market_uuid}/aggregate/stock/BEER").json() == {
+        "stock_code": "BEER", "count": 3, "revenue": "9",
+    }
+    assert client.get(f"/market/{market_uuid}/aggregate/stock/WINE").json() == {
+        "stock_code": "WINE", "count": 2, "revenue": "14",
+    }
+    assert client.get(f"/market/{market_uuid}/aggregate/card/1").json() == {
+        "card_number": 1, "count": 2, "spend": "6",
+    }
+    assert client.get(f"/market/{market_uuid}/aggregate/card/2").json() == {
+        "card_number": 2, "count": 3, "spend": "17",
+    }
+
+
+def test_rejected_purchases_leave_the_counters_alone(client, aws, open_market):
+    table, _, _ = aws
+    market_uuid = open_market()
+
+    from free_market_fandango_api.crud import purchase
+    from free_market_fandango_api.schemas import PurchaseOut
+
+    # Validated against a balance that is no longer current, the whole transaction is cancelled.
+    stale = PurchaseOut(
+        price=3, stock_code="BEER", card_number=1, previous_balance=decimal.Decimal(99),
+        timestamp=datetime.datetime.now(),
+    )
+
+    with pytest.raises(purchase.PurchaseRejected):
+        purchase.create_purchases(table, market_uuid, [stale])
+
+    assert client.get(f"/market/{market_uuid}/aggregate/stock/BEER").status_code == 404
+    assert client.get(f"/market/{market_uuid}/aggregate/card/1").status_code == 404
+
+
+def test_ranking(client, open_market):
+    market_uuid = open_market(cards=((1, 100), (2, 100), (3, 100)), stocks=(("BEER", 3), ("WINE", 7), ("GIN", 5)))
+
+    _buy(
+        client, market_uuid,
+        (1, "BEER", 3), (1, "BEER", 3), (1, "BEER", 3),
+        (2, "WINE", 7), (2, "WINE", 7),
+        (3, "GIN", 5),
+    )
+
+    def ranked(kind, key, **params):
+        return [row[key] for row in client.get(f"/market/{market_uuid}/aggregate/{kind}", params=params).json()]
+
+    assert ranked("stock", "stock_code", sort_by="count") == ["BEER", "WINE", "GIN"]
+    assert ranked("stock", "stock_code", sort_by="revenue") == ["WINE", "BEER", "GIN"]
+    assert ranked("stock", "stock_code", sort_by="revenue", top=2) == ["WINE", "BEER"]
+    assert ranked("card", "card_number", sort_by="spend", top=1) == [2]
+    assert ranked("card", "card_number", sort_by="count") == [1, 2, 3]
+    assert sorted(ranked("card", "card_number")) == [1, 2, 3]
+
+    assert client.get(f"/market/{market_uuid}/aggregate/stock", params={"sort_by": "spend"}).status_code == 422
+    assert client.get(f"/market/{market_uuid}/aggregate/card", params={"top": 0}).status_code == 422
@@ -0,0 +1,68 @@
+import pytest
+
+
+@pytest.fixture
+def cache_invalid_messages(monkeypatch):
+    from free_market_fandango_api import utils
+
+    messages = []
+    send_sqs_batch = utils.send_sqs_batch
+
+    def recording_send_sqs_batch(batch):
+        messages.extend(message for message in batch if message["MessageBody"] == "CacheInvalid")
+
+        return send_sqs_batch(batch)
+
+    monkeypatch.setattr(utils, "send_sqs_batch", recording_send_sqs_batch)
+
+    return messages
+
+
+def _event(index):
+    return {"title": f"Event {index}", "body": "", "breaking": False, "change_min": 1, "change_max": 2}
+
+
+IMPORTS = {
+    "card": (lambda index: {"card_number": index, "name": "Card", "balance": 5}, "card_number"),
+    "stock": (lambda index: {"code": f"S{index:03d}", "name": "Stock", "initial_price": 3}, "code"),
+    "event": (_event, None),
+}
+
+
+@pytest.mark.parametrize("kind", IMPORTS)
+def test_bulk_import_writes_everything_and_notifies_once(client, open_market, cache_invalid_messages, kind):
+    market_uuid = open_market()
+    build, _ = IMPORTS[kind]
+    existing = len(client.get(f"/{kind}").json())
+    cache_invalid_messages.clear()
+
+    # More than the 25 items of a single BatchWriteItem call.
+    response = client.put(f"/{kind}/batch", json=[build(index) for index in range(100, 160)])
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 60
+    assert len(client.get(f"/{kind}").json()) == existing + 60
+
+    assert [message["MessageAttributes"]["MarketUUID"]["StringValue"] for message in cache_invalid_messages] == [
+        market_uuid
+    ]
+
+
+@pytest.mark.parametrize("kind", ["card", "stock"])
+def test_bulk_import_rejects_duplicate_keys(client, kind):
+    build, _ = IMPORTS[kind]
+    items = [build(index) for index in range(30)] + [build(7)]
+
+    response = client.put(f"/{kind}/batch", json=items)
+
+    assert response.status_code == 400
+    assert client.get(f"/{kind}").json() == []
+
+
+def test_bulk_import_size_is_bounded(client):
+    from free_market_fandango_api.constants import MAX_BULK_IMPORT
+
+    response = client.put("/card/batch", json=[IMPORTS["card"][0](index) for index in range(MAX_BULK_IMPORT + 1)])
+
+    assert response.status_code == 422
+    assert client.put("/card/batch", json=[]).status_code == 422
@@ -0,0 +1,15 @@
+def _version(table, partition):
+    return table.get_item(Key={"PK": "Version", "SK": partition}).get("Item", {}).get("Version")
+
+
+def test_single_item_writes_bump_the_version(client, aws):
+    table, _, _ = aws
+
+    assert client.put("/card", json={"card_number": 7, "name": "Card", "balance": 5}).status_code == 200
+    assert _version(table, "Card") == 1
+    assert [card["card_number"] for card in client.get("/card").json()] == [7]
+
+    assert client.delete("/card/7").status_code == 204
+    assert _version(table, "Card") == 2
+    assert "Item" not in table.get_item(Key={"PK": "Card", "SK": "7"})
+    assert client.get("/card").json() == []
@@ -0,0 +1,107 @@
+import base64
+import datetime
+import json
+
+
+def _since(cursor: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(json.loads(base64.urlsafe_b64decode(cursor))["since"])
+
+
+def test_changes_committed_after_the_read_are_returned_once(client, aws, open_market):
+    table, _, _ = aws
+    market_uuid = open_market(cards=((1, 10), (2, 10)))
+
+    first = client.get(f"/market/{market_uuid}/changes").json()
+    assert len(first["balances"]) == 2
+
+    # A purchase stamped just before the first read started but committed after it.
+    table.put_item(
+        Item={
+            "PK": f"Market#{market_uuid}",
+            "SK": "Card#1",
+            "Balance": 4,
+            "UpdatedAt": (_since(first["cursor"]) - datetime.timedelta(seconds=1)).isoformat(),
+        }
+    )
+
+    second = client.get(f"/market/{market_uuid}/changes", params={"since": first["cursor"]}).json()
+    assert second["balances"] == [{"card_number": 1, "balance": "4"}]
+
+    third = client.get(f"/market/{market_uuid}/changes", params={"since": second["cursor"]}).json()
+    assert third["balances"] == []
+
+
+def test_purchase_is_not_returned_again(client, open_market):
+    market_uuid = open_market()
+
+    cursor = client.get(f"/market/{market_uuid}/changes").json()["cursor"]
+    client.post(f"/market/{market_uuid}/purchase", json={"price": 3, "stock_code": "BEER", "card_number": 1})
+
+    changes = client.get(f"/market/{market_uuid}/changes", params={"since": cursor}).json()
+    assert changes["balances"] == [{"card_number": 1, "balance": "7"}]
+
+    changes = client.get(f"/market/{market_uuid}/changes", params={"since": changes["cursor"]}).json()
+    assert changes["balances"] == []
+
+
+def test_long_poll_reads_again_once_the_watcher_sees_a_change(client, aws, open_market, monkeypatch):
+    from free_market_fandango_api import stream
+
+    table, _, _ = aws
+    market_uuid = open_market()
+    cursor = client.get(f"/market/{market_uuid}/changes").json()["cursor"]
+
+    monkeypatch.setattr(stream, "_POLL_SECONDS", 0.1)
+    checks = []
+    check = stream.MarketChangeWatcher._check
+
+    async def counted_check(self, since):
+        checks.append(since)
+
+        if len(checks) == 3:
+            table.put_item(
+                Item={
+                    "PK": f"Market#{market_uuid}",
+                    "SK": "Card#1",
+                    "Balance": 4,
+                    "UpdatedAt": datetime.datetime.now().isoformat(),
+                }
+            )
+
+        return await check(self, since)
+
+    monkeypatch.setattr(stream.MarketChangeWatcher, "_check", counted_check)
+
+    changes = client.get(f"/market/{market_uuid}/changes", params={"since": cursor, "wait": 5}).json()
+
+    assert changes["balances"] == [{"card_number": 1, "balance": "4"}]
+    assert len(checks) == 3
+
+
+def test_price_changes_are_found_against_the_cursor(client, aws, open_market):
+    table, _, _ = aws
+    market_uuid = open_market(stocks=(("BEER", 3), ("WINE", 7)))
+
+    cursor = client.get(f"/market/{market_uuid}/changes").json()["cursor"]
+    table.put_item(Item={"PK": f"Market#{market_uuid}", "SK": "Stock#WINE", "Price": 6})
+
+    changes = client.get(f"/market/{market_uuid}/changes", params={"since": cursor}).json()
+    assert changes["prices"] == [{"stock_code": "WINE", "price": "6"}]
+
+    changes = client.get(f"/market/{market_uuid}/changes", params={"since": changes["cursor"]}).json()
+    assert changes["prices"] == []
+
+
+def test_cursor_with_an_offset_is_read_as_local_time(client, open_market):
+    market_uuid = open_market()
+
+    cursor = client.get(f"/market/{market_uuid}/changes").json()["cursor"]
+    decoded = json.loads(base64.urlsafe_b64decode(cursor))
+    decoded["since"] = _since(cursor).astimezone().astimezone(datetime.timezone.utc).isoformat()
+    aware_cursor = base64.urlsafe_b64encode(json.dumps(decoded).encode()).decode()
+
+    response = client.get(f"/market/{market_uuid}/changes", params={"since": aware_cursor})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["balances"] == []
+    assert _since(response.json()["cursor"]).tzinfo is None
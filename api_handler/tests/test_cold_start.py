@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Cumulative import time of free_market_fandango_api.main, raise it deliberately when a new dependency is worth it.
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "1.5"))
+
+# Only needed on the first Spotify or authenticated request, importing them on a cold start is a regression.
+LAZY_PACKAGES = {"jose", "redis", "spotipy"}
+
+
+def test_main_import_time_is_within_budget():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import free_market_fandango_api.main"],
+        cwd=Path(__file__).resolve().parents[1],
+        env={"SQS_QUEUE_URL": "free-market-fandango.fifo", **os.environ},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package", nested imports are indented.
+    cumulative = {}
+
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "[us]" not in line:
+            _, total, module = line.removeprefix("import time:").split("|")
+            cumulative[module.strip()] = int(total) / 1_000_000
+
+    assert not LAZY_PACKAGES & {module.split(".")[0] for module in cumulative}
+    assert cumulative["free_market_fandango_api.main"] < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_checked_in_openapi_schema_matches_the_routes(aws):
+    from free_market_fandango_api.openapi import OPENAPI_PATH, build_openapi
+
+    assert json.loads(OPENAPI_PATH.read_text()) == json.loads(json.dumps(build_openapi())), (
+        "openapi.json is out of date, run python -m free_market_fandango_api.openapi"
+    )
@@ -0,0 +1,56 @@
+import pytest
+
+
+@pytest.mark.parametrize("resource", ["price", "balance"])
+def test_conditional_get(client, aws, open_market, resource):
+    table, _, _ = aws
+    market_uuid = open_market(cards=((1, 10), (2, 20)), stocks=(("BEER", 3), ("WINE", 7)))
+    path = f"/market/{market_uuid}/{resource}"
+
+    response = client.get(path)
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert etag.startswith('"') and etag.endswith('"')
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    for if_none_match in (etag, f"W/{etag}", "*", f'"other", {etag}'):
+        not_modified = client.get(path, headers={"If-None-Match": if_none_match})
+
+        assert not_modified.status_code == 304, if_none_match
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+
+    assert client.get(path, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    # A change to the content changes the ETag.
+    if resource == "price":
+        table.put_item(Item={"PK": f"Market#{market_uuid}", "SK": "Stock#BEER", "Price": 4})
+    else:
+        table.put_item(Item={"PK": f"Market#{market_uuid}", "SK": "Card#1", "Balance": 9})
+
+    changed = client.get(path, headers={"If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("resource", ["price", "balance"])
+def test_next_cursor_is_kept(client, open_market, resource):
+    market_uuid = open_market(cards=((1, 10), (2, 20)), stocks=(("BEER", 3), ("WINE", 7)))
+    path = f"/market/{market_uuid}/{resource}"
+
+    first = client.get(path, params={"limit": 1})
+    cursor = first.headers["X-Next-Cursor"]
+
+    not_modified = client.get(path, params={"limit": 1}, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["X-Next-Cursor"] == cursor
+
+    second = client.get(path, params={"limit": 1, "cursor": cursor})
+
+    assert len(second.json()) == 1
+    assert second.json() != first.json()
+    assert second.headers["ETag"] != first.headers["ETag"]
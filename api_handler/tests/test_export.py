@@ -0,0 +1,77 @@
+import base64
+import csv
+import gzip
+import io
+import json
+
+
+def _market_with_purchase(client, open_market):
+    market_uuid = open_market()
+    client.post(f"/market/{market_uuid}/purchase", json={"price": 3, "stock_code": "BEER", "card_number": 1})
+
+    return market_uuid
+
+
+def test_ndjson_export(client, open_market):
+    market_uuid = _market_with_purchase(client, open_market)
+
+    response = client.get(f"/market/{market_uuid}/export", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "content-encoding" not in response.headers
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [(row["type"], row.get("price"), row.get("balance")) for row in rows] == [
+        ("purchase", "3", None),
+        ("balance", None, "7"),
+    ]
+
+
+def test_csv_export(client, open_market):
+    market_uuid = _market_with_purchase(client, open_market)
+
+    response = client.get(
+        f"/market/{market_uuid}/export", params={"format": "csv"}, headers={"Accept-Encoding": "identity"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    assert [(row["type"], row["card_number"], row["stock_code"]) for row in rows] == [
+        ("purchase", "1", "BEER"),
+        ("balance", "1", ""),
+    ]
+
+
+def test_gzip_export(client, open_market):
+    market_uuid = _market_with_purchase(client, open_market)
+
+    # The test client decodes gzip itself, the raw stream shows what was sent.
+    with client.stream("GET", f"/market/{market_uuid}/export", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        body = b"".join(response.iter_raw())
+
+    assert [json.loads(line)["type"] for line in gzip.decompress(body).splitlines()] == ["purchase", "balance"]
+
+
+def test_export_under_mangum(client, lambda_request, open_market, monkeypatch):
+    from free_market_fandango_api.routers import market
+
+    market_uuid = _market_with_purchase(client, open_market)
+
+    response = lambda_request("GET", f"/market/{market_uuid}/export", headers={"accept-encoding": "gzip"})
+
+    assert response["statusCode"] == 200
+    body = base64.b64decode(response["body"]) if response["isBase64Encoded"] else response["body"].encode()
+    assert [json.loads(line)["type"] for line in gzip.decompress(body).splitlines()] == ["purchase", "balance"]
+
+    monkeypatch.setattr(market, "_LAMBDA_MAX_EXPORT_BYTES", 10)
+
+    response = lambda_request("GET", f"/market/{market_uuid}/export")
+
+    assert response["statusCode"] == 413
+    assert "Accept-Encoding: gzip" in json.loads(response["body"])["message"]
@@ -0,0 +1,45 @@
+def _price_change(table, market_uuid, code, timestamp, previous_price):
+    table.put_item(
+        Item={"PK": f"Market#{market_uuid}", "SK": f"Price#{code}#{timestamp}", "PreviousPrice": previous_price}
+    )
+
+
+def test_candles_of_every_stock(client, aws, open_market):
+    table, _, _ = aws
+    market_uuid = open_market(stocks=(("BEER", 3), ("WINE", 7)))
+
+    _price_change(table, market_uuid, "BEER", "2026-01-01T10:00:10", 2)
+    _price_change(table, market_uuid, "WINE", "2026-01-01T10:00:20", 8)
+
+    response = client.get(f"/market/{market_uuid}/history/candles", params={"interval": "1m"})
+
+    assert response.status_code == 200, response.text
+    assert sorted((candle["stock_code"], candle["open"], candle["close"]) for candle in response.json()) == [
+        ("BEER", "2", "3"),
+        ("WINE", "8", "7"),
+    ]
+
+
+def test_candles_count_changes_that_became_visible_late(client, aws, open_market):
+    import datetime
+
+    table, _, _ = aws
+    market_uuid = open_market()
+    now = datetime.datetime.now()
+
+    _price_change(table, market_uuid, "BEER", (now - datetime.timedelta(seconds=2)).isoformat(), 2)
+    assert [candle["changes"] for candle in client.get(f"/market/{market_uuid}/history/BEER/candles").json()] == [1]
+
+    # Stamped before the change already read, but only visible now.
+    _price_change(table, market_uuid, "BEER", (now - datetime.timedelta(seconds=3)).isoformat(), 1)
+    candles = client.get(f"/market/{market_uuid}/history/BEER/candles").json()
+
+    assert sum(candle["changes"] for candle in candles) == 2
+    assert candles[0]["open"] == "1"
+
+
+def test_candle_interval_must_be_supported(client, open_market):
+    market_uuid = open_market()
+
+    assert client.get(f"/market/{market_uuid}/history/BEER/candles", params={"interval": "7m"}).status_code == 422
+    assert client.get(f"/market/{market_uuid}/history/BEER/candles", params={"interval": "15m"}).status_code == 200
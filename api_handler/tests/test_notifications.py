@@ -0,0 +1,107 @@
+import pytest
+
+
+def _attributes(market_uuid):
+    return {"MarketUUID": {"DataType": "String", "StringValue": market_uuid}}
+
+
+@pytest.fixture
+def sent_batches(aws, monkeypatch):
+    from free_market_fandango_api import utils
+
+    batches = []
+
+    def send_sqs_batch(messages):
+        batches.append([message["MessageAttributes"]["MarketUUID"]["StringValue"] for message in messages])
+
+        return []
+
+    monkeypatch.setattr(utils, "send_sqs_batch", send_sqs_batch)
+
+    return batches
+
+
+def test_cache_invalid_is_sent_once_per_market(sent_batches):
+    from free_market_fandango_api.utils import NotificationDispatcher
+
+    dispatcher = NotificationDispatcher()
+
+    for market_uuid in ("a", "b", "a", "a", "b"):
+        dispatcher.add_cache_invalid(market_uuid, _attributes(market_uuid))
+
+    assert dispatcher.pending == 2
+
+    dispatcher.flush()
+
+    assert sent_batches == [["a", "b"]]
+    assert dispatcher.pending == 0
+
+    # Once flushed, a market is notified again.
+    dispatcher.add_cache_invalid("a", _attributes("a"))
+    dispatcher.flush()
+
+    assert sent_batches == [["a", "b"], ["a"]]
+
+
+def test_messages_are_sent_in_batches_of_ten(sent_batches):
+    from free_market_fandango_api.utils import NotificationDispatcher
+
+    dispatcher = NotificationDispatcher()
+
+    for index in range(23):
+        dispatcher.add_cache_invalid(str(index), _attributes(str(index)))
+
+    dispatcher.flush()
+
+    assert [len(batch) for batch in sent_batches] == [10, 10, 3]
+    assert sum(sent_batches, []) == [str(index) for index in range(23)]
+
+
+def test_failed_entries_are_retried_once(aws, monkeypatch):
+    from free_market_fandango_api import utils
+
+    calls = []
+
+    def send_sqs_batch(messages):
+        calls.append([message["MessageAttributes"]["MarketUUID"]["StringValue"] for message in messages])
+
+        # The first call refuses "b", every call refuses "c".
+        refused = {"b", "c"} if len(calls) == 1 else {"c"}
+
+        return [index for index, market_uuid in enumerate(calls[-1]) if market_uuid in refused]
+
+    monkeypatch.setattr(utils, "send_sqs_batch", send_sqs_batch)
+
+    utils.send_sqs_messages([utils.sqs_message("CacheInvalid", _attributes(uuid)) for uuid in ("a", "b")])
+
+    assert calls == [["a", "b"], ["b"]]
+
+    calls.clear()
+
+    with pytest.raises(RuntimeError):
+        utils.send_sqs_messages([utils.sqs_message("CacheInvalid", _attributes(uuid)) for uuid in ("a", "c")])
+
+    assert calls == [["a", "c"], ["c"]]
+
+
+def test_only_requests_that_notify_flush(client, open_market, monkeypatch):
+    from free_market_fandango_api import utils
+
+    market_uuid = open_market()
+    flushes = []
+    flush = utils.NotificationDispatcher.flush
+
+    def counted_flush(self):
+        flushes.append(self.pending)
+        flush(self)
+
+    monkeypatch.setattr(utils.NotificationDispatcher, "flush", counted_flush)
+
+    assert client.get("/card").status_code == 200
+    assert client.get(f"/market/{market_uuid}/price").status_code == 200
+    assert flushes == []
+
+    client.put("/card", json={"card_number": 2, "name": "Card", "balance": 5})
+    client.put("/stock", json={"code": "WINE", "name": "Wine", "initial_price": 4})
+
+    assert flushes == [1, 1]
@@ -0,0 +1,113 @@
+import json
+
+
+def _receive(sqs, queue_url):
+    return sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10, MessageAttributeNames=["All"]).get("Messages", [])
+
+
+def _outbox(table, partition="Outbox"):
+    return table.query(KeyConditionExpression="PK = :pk", ExpressionAttributeValues={":pk": partition})["Items"]
+
+
+def _outbox_item(table, market_uuid, timestamp, body="Purchase"):
+    table.put_item(
+        Item={
+            "PK": "Outbox",
+            "SK": f"{market_uuid}#{timestamp}#{body}",
+            "MessageId": f"{market_uuid}-{timestamp}",
+            "MessageBody": body,
+            "MessageAttributes": {"MarketUUID": {"DataType": "String", "StringValue": market_uuid}},
+            "Attempts": 0,
+        }
+    )
+
+
+def test_purchase_is_published_after_the_response(client, aws, open_market):
+    table, sqs, queue_url = aws
+    market_uuid = open_market()
+
+    response = client.post(f"/market/{market_uuid}/purchase", json={"price": 3, "stock_code": "BEER", "card_number": 1})
+
+    assert response.status_code == 200
+    assert _outbox(table) == []
+
+    messages = _receive(sqs, queue_url)
+    purchases = [message for message in messages if message["Body"] == "Purchase"]
+
+    assert len(purchases) == 1
+    assert purchases[0]["MessageAttributes"]["StockCode"]["StringValue"] == "BEER"
+
+
+def test_drain_publishes_in_order_and_deletes(aws):
+    table, sqs, queue_url = aws
+
+    from free_market_fandango_api.outbox import drain_outbox
+
+    for second in range(12):
+        _outbox_item(table, "market", f"2024-01-01T00:00:{second:02d}", body=json.dumps(second))
+
+    assert drain_outbox() == 12
+    assert _outbox(table) == []
+
+    bodies = []
+
+    while messages := _receive(sqs, queue_url):
+        bodies += [json.loads(message["Body"]) for message in messages]
+
+        for message in messages:
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"])
+
+    assert bodies == list(range(12))
+
+
+def test_refused_item_is_dead_lettered(aws, monkeypatch):
+    table, sqs, queue_url = aws
+
+    from free_market_fandango_api import outbox
+
+    _outbox_item(table, "market", "2024-01-01T00:00:00", body="Poison")
+    _outbox_item(table, "market", "2024-01-01T00:00:01")
+
+    def send_sqs_batch(messages):
+        return [index for index, message in enumerate(messages) if message["MessageBody"] == "Poison"]
+
+    monkeypatch.setattr(outbox, "send_sqs_batch", send_sqs_batch)
+
+    drainer = outbox.OutboxDrainer(table, max_attempts=2)
+
+    assert drainer.drain() == 0
+    assert [item["Attempts"] for item in _outbox(table)] == [1, 0]
+
+    assert drainer.drain() == 0
+    assert [item["MessageBody"] for item in _outbox(table, "OutboxDeadLetter")] == ["Poison"]
+
+    assert drainer.drain() == 1
+    assert _outbox(table) == []
+
+
+def test_purchase_under_mangum_leaves_publishing_to_the_stream(aws, lambda_request, open_market):
+    table, sqs, queue_url = aws
+
+    from free_market_fandango_api import outbox
+
+    market_uuid = open_market()
+
+    # Messages of one FIFO group are held back while earlier ones are in flight.
+    for message in _receive(sqs, queue_url):
+        sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"])
+
+    response = lambda_request(
+        "POST", f"/market/{market_uuid}/purchase", {"price": 3, "stock_code": "BEER", "card_number": 1}
+    )
+
+    assert response["statusCode"] == 200, response["body"]
+    assert [item["MessageBody"] for item in _outbox(table)] == ["Purchase"]
+
+    records = [
+        {"eventName": "INSERT", "dynamodb": {"Keys": {"PK": {"S": item["PK"]}, "SK": {"S": item["SK"]}}}}
+        for item in _outbox(table)
+    ]
+
+    assert outbox.handler({"Records": records}, None) == {"published": 1}
+    assert _outbox(table) == []
+    assert [message["Body"] for message in _receive(sqs, queue_url)] == ["Purchase"]
@@ -0,0 +1,56 @@
+import base64
+import json
+
+
+def _cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def test_catalog_pages(client):
+    client.put("/card/batch", json=[{"card_number": number, "name": "Card", "balance": 5} for number in range(5)])
+
+    first = client.get("/card", params={"limit": 3})
+    second = client.get("/card", params={"cursor": first.headers["X-Next-Cursor"]})
+
+    assert len(first.json()) == 3
+    assert len(second.json()) == 2
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_cursor_with_non_string_values_is_rejected(client):
+    response = client.get("/card", params={"cursor": _cursor({"PK": "Card", "SK": 5})})
+
+    assert response.status_code == 400
+    assert response.json() == {"message": "Invalid pagination cursor"}
+
+
+def test_cursor_from_another_partition_is_rejected(client, open_market):
+    market_uuid = open_market()
+
+    assert client.get("/card", params={"cursor": _cursor({"PK": "Stock", "SK": "BEER"})}).status_code == 400
+
+    response = client.get(f"/market/{market_uuid}/purchase", params={"cursor": _cursor({"PK": "Card", "SK": "1"})})
+
+    assert response.status_code == 400
+
+
+
+def test_listing_without_a_limit_reads_one_page(client, open_market, monkeypatch):
+    from free_market_fandango_api.aws import get_dynamodb_table
+    from free_market_fandango_api.constants import MAX_PAGE_SIZE
+
+    market_uuid = open_market()
+    table = get_dynamodb_table()
+    query = table.query
+    limits = []
+
+    def recording_query(**kwargs):
+        limits.append(kwargs.get("Limit"))
+
+        return query(**kwargs)
+
+    monkeypatch.setattr(table, "query", recording_query)
+
+    assert client.get(f"/market/{market_uuid}/purchase").status_code == 200
+    assert client.get(f"/market/{market_uuid}/history").status_code == 200
+    assert limits == [MAX_PAGE_SIZE, MAX_PAGE_SIZE]
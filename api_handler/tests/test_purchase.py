@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+
+def _balances(client, market_uuid):
+    return {balance["card_number"]: balance["balance"] for balance in client.get(f"/market/{market_uuid}/balance").json()}
+
+
+def test_batch_reports_a_result_per_purchase(client, open_market):
+    market_uuid = open_market(cards=((1, 10), (2, 5)), stocks=(("BEER", 3), ("WINE", 4)))
+
+    response = client.post(
+        f"/market/{market_uuid}/purchase/batch",
+        json=[
+            {"price": 3, "stock_code": "BEER", "card_number": 1},
+            {"price": 4, "stock_code": "WINE", "card_number": 1},
+            {"price": 4, "stock_code": "WINE", "card_number": 1},
+            {"price": 3, "stock_code": "NOPE", "card_number": 2},
+            {"price": 3, "stock_code": "BEER", "card_number": 9},
+        ],
+    )
+
+    assert response.status_code == 200
+    assert [result["status_code"] for result in response.json()] == [200, 200, 400, 404, 404]
+    assert _balances(client, market_uuid) == {1: "3", 2: "5"}
+
+
+def test_batch_rejects_only_the_purchases_of_a_concurrently_charged_card(client, aws, open_market, monkeypatch):
+    table, _, _ = aws
+    market_uuid = open_market(cards=((1, 10), (2, 10)))
+
+    from free_market_fandango_api.crud import market
+
+    read_purchase_details = market.read_purchase_details
+
+    def charge_card_2_concurrently(*args):
+        details = read_purchase_details(*args)
+        table.update_item(
+            Key={"PK": f"Market#{market_uuid}", "SK": "Card#2"},
+            UpdateExpression="SET Balance = :balance",
+            ExpressionAttributeValues={":balance": Decimal(7)},
+        )
+        monkeypatch.setattr(market, "read_purchase_details", read_purchase_details)
+
+        return details
+
+    monkeypatch.setattr(market, "read_purchase_details", charge_card_2_concurrently)
+
+    response = client.post(
+        f"/market/{market_uuid}/purchase/batch",
+        json=[
+            {"price": 3, "stock_code": "BEER", "card_number": 1},
+            {"price": 3, "stock_code": "BEER", "card_number": 2},
+            {"price": 3, "stock_code": "BEER", "card_number": 1},
+        ],
+    )
+
+    results = response.json()
+
+    assert [result["status_code"] for result in results] == [200, 400, 200]
+    assert results[1]["message"] == "Card balance has changed, please submit again"
+    assert _balances(client, market_uuid) == {1: "4", 2: "7"}
+    assert len(client.get(f"/market/{market_uuid}/purchase").json()) == 2
+
+
+def test_batch_is_resubmitted_after_a_conflict(client, open_market, monkeypatch):
+    market_uuid = open_market()
+
+    from free_market_fandango_api.crud import purchase
+
+    create_purchases = purchase.create_purchases
+    attempts = []
+
+    def conflict_once(*args):
+        attempts.append(1)
+
+        if len(attempts) == 1:
+            raise purchase.PurchaseRejected(purchase.PURCHASE_CONFLICT, {})
+
+        return create_purchases(*args)
+
+    monkeypatch.setattr(purchase, "create_purchases", conflict_once)
+
+    response = client.post(
+        f"/market/{market_uuid}/purchase/batch",
+        json=[{"price": 3, "stock_code": "BEER", "card_number": 1}],
+    )
+
+    assert [result["status_code"] for result in response.json()] == [200]
+    assert len(attempts) == 2
+
+
+def test_single_purchase_is_resubmitted_after_a_conflict(client, open_market, monkeypatch):
+    market_uuid = open_market()
+
+    from free_market_fandango_api.crud import purchase
+
+    create_purchases = purchase.create_purchases
+    attempts = []
+
+    def conflict_once(*args):
+        attempts.append(1)
+
+        if len(attempts) == 1:
+            raise purchase.PurchaseRejected(purchase.PURCHASE_CONFLICT, {})
+
+        return create_purchases(*args)
+
+    monkeypatch.setattr(purchase, "create_purchases", conflict_once)
+
+    response = client.post(f"/market/{market_uuid}/purchase", json={"price": 3, "stock_code": "BEER", "card_number": 1})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["previous_balance"] == "10"
+    assert len(attempts) == 2
+
+
+def test_single_purchase_rejections_keep_their_status(client, open_market):
+    market_uuid = open_market()
+
+    response = client.post(f"/market/{market_uuid}/purchase", json={"price": 3, "stock_code": "NOPE", "card_number": 1})
+    assert (response.status_code, response.json()) == (404, {"message": "Stock does not exist"})
+
+    response = client.post(f"/market/{market_uuid}/purchase", json={"price": 20, "stock_code": "BEER", "card_number": 1})
+    assert response.status_code == 400
+    assert response.json()["message"] == "Stock price has changed, please refresh and submit again"
+
+
+def test_time_range_must_not_be_reversed(client, open_market):
+    market_uuid = open_market()
+
+    response = client.get(
+        f"/market/{market_uuid}/purchase/1", params={"from": "2026-01-02T00:00:00", "to": "2026-01-01T00:00:00"}
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"message": "The from time must not be after the to time"}
+    assert client.get(
+        f"/market/{market_uuid}/purchase/1", params={"from": "2026-01-01T00:00:00", "to": "2026-01-02T00:00:00"}
+    ).status_code == 200
@@ -0,0 +1,10 @@
+import json
+
+
+def test_stream_is_refused_under_mangum(lambda_request, open_market):
+    market_uuid = open_market()
+
+    response = lambda_request("GET", f"/market/{market_uuid}/stream")
+
+    assert response["statusCode"] == 501
+    assert "poll /changes" in json.loads(response["body"])["message"]
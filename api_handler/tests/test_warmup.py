@@ -0,0 +1,44 @@
+import pytest
+
+
+@pytest.mark.parametrize("event, expected", [
+    ({"warmup": True}, True),
+    ({"source": "aws.events", "detail-type": "Scheduled Event"}, True),
+    ({"warmup": "yes"}, False),
+    ({"source": "aws.events", "detail-type": "Object Created"}, False),
+    ({"version": "2.0", "rawPath": "/market"}, False),
+    ("warmup", False),
+])
+def test_is_warmup_event(aws, event, expected):
+    from free_market_fandango_api.warmup import is_warmup_event
+
+    assert is_warmup_event(event) is expected
+
+
+def test_with_warmup_answers_pings_and_forwards_the_rest(aws, open_market):
+    from free_market_fandango_api.warmup import with_warmup
+
+    open_market()
+    forwarded = []
+    handler = with_warmup(lambda event, context: forwarded.append(event) or {"statusCode": 200})
+
+    result = handler({"warmup": True}, None)
+
+    assert forwarded == []
+    assert result["warmup"] is True
+    assert result["primed"] == ["dynamodb", "sqs", "jose"]
+    assert result["failed"] == {}
+
+    assert handler({"version": "2.0"}, None) == {"statusCode": 200}
+    assert forwarded == [{"version": "2.0"}]
+
+
+def test_failed_step_is_reported(aws, monkeypatch):
+    from free_market_fandango_api import warmup
+
+    monkeypatch.delenv("SQS_QUEUE_URL")
+
+    result = warmup.warm_up()
+
+    assert result["primed"] == ["dynamodb", "jose"]
+    assert list(result["failed"]) == ["sqs"]